@@ -1,6 +1,9 @@
 # app.py
 import streamlit as st
 from streamlit_extras.app_logo import add_logo
+import metrics
+from model_manager import model_manager
+import rescoring
 
 # Page Configuration
 st.set_page_config(
@@ -9,6 +12,9 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="collapsed"
 )
+metrics.start_http_server()  # no-op unless TALENTHUNT_METRICS_PORT is set
+model_manager.start()  # loads the Ollama models in the background so the first candidate doesn't wait
+rescoring.start_background_rescorer()  # resumes rescores queued before a restart
 
 # Custom CSS for Premium Look & Clickable Cards
 st.markdown("""
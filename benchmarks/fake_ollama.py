@@ -0,0 +1,177 @@
+"""
+A local stand-in for the Ollama HTTP API, for benchmarks and offline development.
+
+Serves the endpoints the app uses (/api/embed, /api/chat, /api/generate, plus
+/api/tags and /api/version) with deterministic output and configurable latency:
+  - embeddings are hashed bags of words, so similar texts get similar vectors
+    and identical inputs always get identical vectors
+  - chat/generate replies are chosen from the prompt (a JSON array of questions,
+    a "Rating: Reason" line, or a follow-up question) and stream as NDJSON
+
+Usage:
+    python benchmarks/fake_ollama.py [--port 11435] [--chat-latency 0.5] [--embed-latency 0.05]
+    OLLAMA_HOST=http://127.0.0.1:11435 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBEDDING_DIM = 768  # nomic-embed-text
+DEFAULT_PORT = 11435
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """Deterministic, L2-normalized hashed bag-of-words embedding."""
+    vector = [0.0] * dim
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def reply_for(prompt: str) -> str:
+    """Picks a canned, deterministic reply shaped like what the prompt asks for."""
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    if "JSON array" in prompt:
+        match = re.search(r"exactly (\d+)", prompt)
+        n = int(match.group(1)) if match else 3
+        topics = ["system design", "testing strategy", "performance tuning", "incident response", "code review"]
+        return json.dumps([
+            f"Can you walk me through your experience with {topics[(seed + i) % len(topics)]}?" for i in range(n)
+        ])
+    if "Rate this answer" in prompt:
+        rating = ["Strong", "Average", "Weak"][seed % 3]
+        return f"{rating}: The answer addresses the question with a reasonable level of detail."
+    return "What trade-offs did you consider, and how would you approach it differently today?"
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    disable_nagle_algorithm = True  # otherwise small keep-alive responses stall on delayed ACKs
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            line = json.dumps(chunk).encode("utf-8") + b"\n"
+            self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": name, "model": name} for name in self.server.models]})
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        elif self.path == "/":
+            self._send_json({"status": "Ollama is running"})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        request = self._read_json()
+        self.server.count(self.path)
+        if self.path == "/api/embed":
+            inputs = request.get("input", "")
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            time.sleep(self.server.embed_latency)
+            self._send_json({"model": request.get("model"), "embeddings": [embed_text(text) for text in inputs]})
+        elif self.path == "/api/embeddings":
+            time.sleep(self.server.embed_latency)
+            self._send_json({"embedding": embed_text(request.get("prompt", ""))})
+        elif self.path == "/api/chat":
+            prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+            self._complete(request, prompt, lambda token: {"message": {"role": "assistant", "content": token}})
+        elif self.path == "/api/generate":
+            self._complete(request, request.get("prompt", ""), lambda token: {"response": token})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _complete(self, request: dict, prompt: str, wrap):
+        """Sends a reply to a chat/generate request, streaming it token by token if asked to (Ollama's default)."""
+        text = reply_for(prompt)
+        base = {"model": request.get("model"), "created_at": _now()}
+        final = {**base, **wrap(""), "done": True, "done_reason": "stop",
+                 "prompt_eval_count": len(prompt.split()), "eval_count": len(text.split())}
+        if not request.get("stream", True):
+            time.sleep(self.server.chat_latency)
+            self._send_json({**final, **wrap(text)})
+            return
+
+        tokens = re.findall(r"\S+\s*", text) or [text]
+        delay = self.server.chat_latency / len(tokens)
+
+        def chunks():
+            for token in tokens:
+                time.sleep(delay)
+                yield {**base, **wrap(token), "done": False}
+            yield final
+        self._send_stream(chunks())
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = DEFAULT_PORT, chat_latency: float = 0.0, embed_latency: float = 0.0,
+                 models=("nomic-embed-text", "mistral:7b-instruct")):
+        super().__init__(("127.0.0.1", port), FakeOllamaHandler)
+        self.chat_latency = chat_latency
+        self.embed_latency = embed_latency
+        self.models = list(models)
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self) -> "FakeOllamaServer":
+        """Serves on a daemon thread and returns self; use port=0 to pick a free port."""
+        threading.Thread(target=self.serve_forever, daemon=True, name="fake-ollama").start()
+        return self
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--chat-latency", type=float, default=0.0, help="seconds per chat/generate reply")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embed request")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.port, args.chat_latency, args.embed_latency)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
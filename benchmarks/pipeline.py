@@ -0,0 +1,287 @@
+"""
+Per-stage benchmarks for screening, interviews and storage, run against a local fake Ollama.
+
+Everything runs in a temporary directory (database, caches and Chroma store) with
+OLLAMA_HOST pointed at benchmarks/fake_ollama.py, so results are reproducible and
+don't need a GPU or a live model. Stages timed:
+  - rag_engine.init                          building the engine (JD embeddings, Chroma)
+  - parse_pdf.cold / .cached                 synthetic resume corpus, first and repeat parse
+  - calculate_match_score.cold / .cached     resume embedding miss vs. embedding-cache hit
+  - generate_initial_questions.cold / .cached
+  - generate_followup_question, stream_followup_question.first_token, analyze_response
+  - interview_session.followup               every turn of a long chat-session interview,
+                                             including folding old turns into the summary
+  - save_candidate@N, view_all_candidates@N, list_candidates@N   at each table size N
+
+Results (seconds) are written as JSON; --compare flags stages whose median got slower.
+
+Usage:
+    python benchmarks/pipeline.py [--output results.json] [--compare baseline.json]
+    python benchmarks/pipeline.py --rows 1000,10000 --chat-latency 0.2 --embed-latency 0.02
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from fake_ollama import FakeOllamaServer
+from synthetic_pdfs import resume_lines, write_corpus
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_ROWS = "1000,10000,100000"
+FILL_BATCH_SIZE = 1000
+NOISE_FLOOR = 0.001  # seconds; smaller differences are never reported as regressions
+SESSION_TURNS = 12
+
+def summarize(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+class Benchmark:
+    def __init__(self, args):
+        self.args = args
+        self.stages = {}
+
+    def record(self, name: str, samples: list):
+        self.stages[name] = summarize(samples)
+        stats = self.stages[name]
+        print(f"  {name:<42} p50 {stats['p50'] * 1000:9.2f} ms   p95 {stats['p95'] * 1000:9.2f} ms   (n={stats['n']})")
+
+    def time_each(self, name: str, fn, items: list) -> list:
+        samples, results = [], []
+        for item in items:
+            started = time.perf_counter()
+            results.append(fn(item))
+            samples.append(time.perf_counter() - started)
+        self.record(name, samples)
+        return results
+
+    def run_screening(self, workdir: str) -> list:
+        from rag_engine import rag_engine
+        from job_descriptions import JOBS
+
+        started = time.perf_counter()
+        rag_engine._lazy_get()
+        self.record("rag_engine.init", [time.perf_counter() - started])
+
+        # One extra file warms up the extraction process pool outside the timed runs
+        paths = write_corpus(os.path.join(workdir, "pdfs"), self.args.resumes + 1, self.args.pages)
+        rag_engine.parse_pdf(paths.pop())
+        texts = self.time_each("parse_pdf.cold", rag_engine.parse_pdf, paths)
+        self.time_each("parse_pdf.cached", rag_engine.parse_pdf, paths)
+
+        jd_text = next(iter(JOBS.values()))
+        score = lambda text: rag_engine.calculate_match_score(text, jd_text)
+        self.time_each("calculate_match_score.cold", score, texts)
+        self.time_each("calculate_match_score.cached", score, texts)
+        return texts
+
+    def run_interview(self, texts: list):
+        from interview_agent import interview_agent
+        from job_descriptions import JOBS
+
+        jd_text = next(iter(JOBS.values()))
+        resumes = texts[:self.args.llm_calls]
+        generate = lambda text: interview_agent.generate_initial_questions(text, jd_text)
+        questions = self.time_each("generate_initial_questions.cold", generate, resumes)
+        self.time_each("generate_initial_questions.cached", generate, resumes)
+
+        turns = []
+        for index, text in enumerate(resumes):
+            question = questions[index][0]
+            answer = f"In my last role I {text.split(chr(10))[-1].strip(' -,')} and owned the rollout end to end."
+            history = [{"role": "assistant", "content": question}, {"role": "user", "content": answer}]
+            turns.append((history, question, answer))
+
+        self.time_each("generate_followup_question",
+                       lambda turn: interview_agent.generate_followup_question(turn[0], turn[2]), turns)
+
+        def first_token(turn):
+            stream = interview_agent.stream_followup_question(turn[0], turn[2])
+            started = time.perf_counter()
+            next(stream)
+            elapsed = time.perf_counter() - started
+            for _ in stream:
+                pass
+            return elapsed
+        self.record("stream_followup_question.first_token", [first_token(turn) for turn in turns])
+
+        self.time_each("analyze_response", lambda turn: interview_agent.analyze_response(turn[1], turn[2]), turns)
+
+        samples = []
+        for text, (_, question, answer) in zip(resumes, turns):
+            session = interview_agent.start_session(text, jd_text)
+            session.add_message("assistant", question)
+            for turn in range(SESSION_TURNS):
+                # Answers grow over the interview, so unbounded history would show up as a trend
+                session.add_message("user", " ".join([answer] * (turn + 1)))
+                started = time.perf_counter()
+                question = session.next_question()
+                samples.append(time.perf_counter() - started)
+                session.add_message("assistant", question)
+        self.record("interview_session.followup", samples)
+
+    @staticmethod
+    def candidate_data(index: int) -> dict:
+        lines = resume_lines(index, pages=1)[0]
+        return {
+            "full_name": lines[0],
+            "email": f"candidate{index}@example.com",
+            "phone": f"+1 555 {index:07d}",
+            "years_experience": index % 15,
+            "desired_positions": "Software Engineer",
+            "location": "Remote",
+            "tech_stack": lines[7],
+            "resume_text": "\n".join(lines),
+            "match_score": (index * 7919 % 1000) / 1000,
+            "candidate_summary": "Interview Completed",
+            "interview_transcript": [
+                {"role": "assistant", "content": "Tell me about a project you're proud of."},
+                {"role": "user", "content": lines[10]},
+            ],
+        }
+
+    def fill_candidates(self, db, target: int):
+        """Bulk-inserts synthetic candidates until the table holds `target` rows."""
+        with db.get_connection() as conn:
+            current = conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+        while current < target:
+            batch = min(FILL_BATCH_SIZE, target - current)
+            with db.transaction() as conn:
+                cursor = conn.cursor()
+                for index in range(current, current + batch):
+                    candidate_id = db._insert_candidate(cursor, self.candidate_data(index))
+                    db._index_candidate(cursor, candidate_id)
+            current += batch
+
+    def run_storage(self):
+        import database as db
+
+        db.init_db()
+        next_index = 10 ** 7  # save_candidate rows get indexes apart from the filler rows
+        for rows in self.args.rows:
+            started = time.perf_counter()
+            self.fill_candidates(db, rows)
+            print(f"  (filled candidates table to {rows} rows in {time.perf_counter() - started:.1f}s)")
+
+            new_rows = [self.candidate_data(next_index + i) for i in range(self.args.db_ops)]
+            next_index += self.args.db_ops
+            self.time_each(f"save_candidate@{rows}", db.save_candidate, new_rows)
+            self.time_each(f"view_all_candidates@{rows}", lambda _: db.view_all_candidates(), range(self.args.view_repeat))
+            self.time_each(f"list_candidates@{rows}", lambda _: db.list_candidates("match_score", 20), range(self.args.db_ops))
+
+    def run(self) -> dict:
+        server = FakeOllamaServer(0, self.args.chat_latency, self.args.embed_latency).start()
+        os.environ["OLLAMA_HOST"] = server.url
+        workdir = tempfile.mkdtemp(prefix="talenthunt-bench-")
+        cwd = os.getcwd()
+        # The database, caches and Chroma store all use paths relative to the working directory
+        os.chdir(workdir)
+        try:
+            import database as db
+            db.DB_FILE = os.path.join(workdir, "candidates.db")
+
+            print("Screening")
+            texts = self.run_screening(workdir)
+            print("Interview")
+            self.run_interview(texts)
+            print("Storage")
+            self.run_storage()
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+            if self.args.keep:
+                print(f"Kept working directory {workdir}")
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        return {"meta": self.metadata(server), "stages": self.stages}
+
+    def metadata(self, server) -> dict:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "resumes": self.args.resumes, "pages": self.args.pages, "llm_calls": self.args.llm_calls,
+                "rows": self.args.rows, "db_ops": self.args.db_ops, "view_repeat": self.args.view_repeat,
+                "chat_latency": self.args.chat_latency, "embed_latency": self.args.embed_latency,
+            },
+            "fake_ollama_requests": dict(server.requests),
+        }
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Prints the median change per stage and returns the names of stages that regressed."""
+    if baseline["meta"].get("config") != current["meta"].get("config"):
+        print("Warning: baseline was run with a different configuration; comparisons may not be meaningful")
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} (p50, regression threshold {threshold:.0%})")
+    regressions = []
+    for name, stats in current["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            print(f"  {name:<42} {'new':>12}")
+            continue
+        change = (stats["p50"] - before["p50"]) / before["p50"] if before["p50"] else 0.0
+        regressed = change > threshold and stats["p50"] - before["p50"] > NOISE_FLOOR
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<42} {before['p50'] * 1000:9.2f} -> {stats['p50'] * 1000:9.2f} ms  {change:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown reported as a regression")
+    parser.add_argument("--resumes", type=int, default=50, help="synthetic PDFs to parse and score")
+    parser.add_argument("--pages", type=int, default=2, help="pages per synthetic PDF")
+    parser.add_argument("--llm-calls", type=int, default=20, help="samples per InterviewAgent method")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="comma-separated candidate table sizes")
+    parser.add_argument("--db-ops", type=int, default=50, help="save_candidate/list_candidates samples per size")
+    parser.add_argument("--view-repeat", type=int, default=3, help="view_all_candidates samples per size")
+    parser.add_argument("--chat-latency", type=float, default=0.0, help="fake Ollama seconds per chat reply")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="fake Ollama seconds per embed request")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    args = parser.parse_args()
+    args.rows = sorted(int(n) for n in args.rows.split(",") if n.strip())
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = Benchmark(args).run()
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if baseline is not None and compare(baseline, results, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Startup-time report for the Candidate Portal's backend modules.
+
+Each measurement runs in a fresh interpreter so import caches don't skew the numbers:
+  - import:      importing rag_engine and interview_agent (what every page load pays)
+  - first use:   building both singletons on first attribute access
+  - eager total: import + first use, i.e. what the old import-time construction cost
+
+Usage:
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MEASURE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from rag_engine import rag_engine
+from interview_agent import interview_agent
+imported = time.perf_counter()
+rag_engine._lazy_get()
+interview_agent._lazy_get()
+initialized = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_use": initialized - imported}))
+"""
+
+def measure_once() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    # Initialization may print warnings (e.g. Ollama not running); the JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    imports = [s["import"] for s in samples]
+    first_uses = [s["first_use"] for s in samples]
+    totals = [s["import"] + s["first_use"] for s in samples]
+
+    print(f"Startup report (median of {args.runs} fresh interpreters)")
+    print(f"  import (lazy):        {statistics.median(imports) * 1000:8.1f} ms")
+    print(f"  first use:            {statistics.median(first_uses) * 1000:8.1f} ms")
+    print(f"  eager total (before): {statistics.median(totals) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
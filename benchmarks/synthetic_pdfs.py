@@ -0,0 +1,96 @@
+"""
+Deterministic synthetic resume PDFs for benchmarks (no PDF library needed to write them).
+
+Usage:
+    python benchmarks/synthetic_pdfs.py OUTPUT_DIR [--count 100] [--pages 2]
+"""
+import argparse
+import os
+import random
+from typing import List
+
+SKILLS = [
+    "Python", "Go", "Java", "TypeScript", "React", "Kubernetes", "Docker", "Terraform", "AWS", "GCP",
+    "PostgreSQL", "Redis", "Kafka", "Spark", "Airflow", "PyTorch", "TensorFlow", "scikit-learn",
+    "CI/CD", "Linux", "gRPC", "GraphQL", "Prometheus", "microservices", "distributed systems",
+]
+TITLES = ["Software Engineer", "Data Engineer", "ML Engineer", "DevOps Engineer", "Backend Developer", "Data Scientist"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Okafor", "Novak", "Silva", "Kim", "Müller", "Haddad"]
+
+def _escape(line: str) -> str:
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """Builds a minimal PDF with one Helvetica text line per list entry on each page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = " T* ".join(f"({_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 72 740 Td {text} ET".encode("latin-1")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode('latin-1')}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_at = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("ascii") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("ascii")
+    return out
+
+def resume_lines(index: int, pages: int = 2) -> List[List[str]]:
+    """Resume text for candidate `index`, ~45 lines per page; the same index always gives the same text."""
+    rng = random.Random(index)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    title = rng.choice(TITLES)
+    first = [
+        name, f"{title} | {name.split()[0].lower()}{index}@example.com | +1 555 {index:07d}",
+        "", "SUMMARY",
+        f"{title} with {rng.randint(1, 15)} years of experience in {', '.join(rng.sample(SKILLS, 4))}.",
+        "", "SKILLS", ", ".join(rng.sample(SKILLS, 10)), "", "EXPERIENCE",
+    ]
+    result = [first]
+    for page in range(pages):
+        lines = result[page] if page == 0 else []
+        while len(lines) < 45:
+            skills = rng.sample(SKILLS, 3)
+            lines.append(f"- Built and operated {skills[0]} services using {skills[1]} and {skills[2]},")
+            lines.append(f"  improving latency by {rng.randint(5, 60)}% for {rng.randint(1, 50)}k daily users.")
+        if page:
+            result.append(lines)
+    return result
+
+def make_resume_pdf(index: int, pages: int = 2) -> bytes:
+    return make_pdf(resume_lines(index, pages))
+
+def write_corpus(directory: str, count: int, pages: int = 2) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"resume_{index:05d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_resume_pdf(index, pages))
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=2)
+    args = parser.parse_args()
+    paths = write_corpus(args.directory, args.count, args.pages)
+    print(f"Wrote {len(paths)} PDFs to {args.directory}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "cache.db"
+
+class DiskCache:
+    """
+    A small SQLite-backed key/value cache with LRU eviction and an optional TTL.
+    Values are stored as-is (bytes or str); callers handle their own encoding.
+    """
+    def __init__(self, table: str, path: str = CACHE_FILE, max_entries: int = 1000, ttl: float = None):
+        self.table = table
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value BLOB,
+                created_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(accessed_at)")
+        self._conn.commit()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and created_at + self.ttl < now
+
+    def get(self, key: str, default=None):
+        """Returns the cached value for `key`, or `default` on a miss."""
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys) -> dict:
+        """Returns a dict of the keys that were found (and not expired)."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        expired = []
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM {self.table} WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self._is_expired(created_at, now):
+                        expired.append(key)
+                    else:
+                        found[key] = value
+            if found:
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+            if expired:
+                self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in expired])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value):
+        self.set_many({key: value})
+
+    def set_many(self, items: dict):
+        """Stores several values in one transaction, then evicts least recently used entries."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, value, now, now) for key, value in items.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?
+                )
+            """, (excess,))
+            self.evictions += excess
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters for this cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
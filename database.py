@@ -1,67 +1,962 @@
 import sqlite3
+import hashlib
 import json
-from datetime import datetime
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import metrics
 
 DB_FILE = "candidates.db"
+EVALUATION_LEASE_SECONDS = 15 * 60  # a running job older than this is assumed abandoned
+RESCORE_LEASE_SECONDS = 5 * 60  # a rescore job without progress for this long is assumed abandoned
+RESCORE_RETRY_SECONDS = 10 * 60  # a role whose rescore failed isn't queued again for this long
+POOL_SIZE = 8
+POOL_TIMEOUT = 30  # seconds to wait for a free pooled connection
+BUSY_TIMEOUT_MS = 5000
+
+# Columns needed to list candidates; the large resume/transcript blobs are fetched separately
+SUMMARY_COLUMNS = (
+    "id", "full_name", "email", "phone", "years_experience", "desired_positions",
+    "location", "tech_stack", "match_score", "submission_time", "candidate_summary",
+)
+DETAIL_COLUMNS = ("id", "resume_text", "interview_transcript", "sentiment_analysis")
+SORT_COLUMNS = ("match_score", "submission_time")
+SCORE_BUCKETS = 10  # role_stats histogram: [0, 0.1), [0.1, 0.2), ..., [0.9, 1.0]
+
+# Connection Pool
+class _ConnectionPool:
+    """A small thread-safe pool of SQLite connections to one database file."""
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly by transaction()
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")  # readers don't block the writer and vice versa
+        conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, far fewer fsyncs
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-16000")  # ~16 MB page cache per connection
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=POOL_TIMEOUT)
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_pool = None
+_pool_lock = threading.Lock()
+_migrated_path = None
+
+def _get_pool() -> _ConnectionPool:
+    global _pool
+    with _pool_lock:
+        # DB_FILE may be repointed (e.g. by benchmarks); start a fresh pool for the new file
+        if _pool is None or _pool.path != DB_FILE:
+            if _pool is not None:
+                _pool.close()
+            _pool = _ConnectionPool(DB_FILE)
+        return _pool
+
+@contextmanager
+def get_connection():
+    """Borrows a pooled connection (autocommit mode) and returns it to the pool afterwards."""
+    pool = _get_pool()
+    with metrics.timer("db.pool_acquire"):
+        conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+@contextmanager
+def transaction(immediate: bool = True):
+    """
+    Runs a block in a single transaction on a pooled connection.
+    Writers use BEGIN IMMEDIATE so lock contention is resolved by the busy timeout
+    up front, rather than failing when a read transaction tries to upgrade.
+    """
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+# Schema Migrations
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+# Statements are idempotent so databases created before versioning upgrade cleanly.
+MIGRATIONS = [
+    # 1: candidates table
+    [
+        """
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT,
+            email TEXT,
+            phone TEXT,
+            years_experience TEXT,
+            desired_positions TEXT,
+            location TEXT,
+            tech_stack TEXT,
+            technical_answers TEXT,
+            sentiment_analysis TEXT,
+            submission_time TEXT,
+            resume_text TEXT,
+            match_score REAL,
+            interview_transcript TEXT,
+            candidate_summary TEXT
+        )
+        """,
+    ],
+    # 2: evaluation job queue
+    [
+        """
+        CREATE TABLE IF NOT EXISTS evaluation_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_evaluation_jobs_status ON evaluation_jobs(status, id)",
+    ],
+    # 3: indexes for the dashboard's sort orders and email lookups
+    [
+        "CREATE INDEX IF NOT EXISTS idx_candidates_match_score ON candidates(match_score)",
+        "CREATE INDEX IF NOT EXISTS idx_candidates_submission_time ON candidates(submission_time)",
+        "CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates(email)",
+    ],
+    # 4: one row per interview turn; existing JSON transcripts are converted and the blobs cleared
+    [
+        """
+        CREATE TABLE IF NOT EXISTS interview_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER NOT NULL,
+            turn INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_interview_messages_candidate ON interview_messages(candidate_id, turn)",
+        """
+        INSERT OR IGNORE INTO interview_messages (candidate_id, turn, role, content, created_at)
+        SELECT c.id, m.key, json_extract(m.value, '$.role'), json_extract(m.value, '$.content'), c.submission_time
+        FROM candidates c, json_each(c.interview_transcript) m
+        WHERE json_valid(c.interview_transcript) AND json_type(c.interview_transcript) = 'array'
+        """,
+        """
+        UPDATE candidates SET interview_transcript = NULL
+        WHERE json_valid(interview_transcript) AND json_type(interview_transcript) = 'array'
+        """,
+    ],
+    # 5: full-text index over resumes, skills and transcripts (rowid = candidate id)
+    [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS candidate_search USING fts5(
+            resume_text, tech_stack, transcript, tokenize = 'porter unicode61'
+        )
+        """,
+        lambda conn: _populate_search_index(conn),
+    ],
+    # 6: files already processed by the bulk ingestion CLI, so re-runs can resume
+    [
+        """
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            file_hash TEXT PRIMARY KEY,
+            path TEXT,
+            candidate_id INTEGER,
+            ingested_at TEXT
+        )
+        """,
+    ],
+    # 7: per-role aggregates for the dashboard, maintained by every candidate insert
+    # (first populated by migration 10, once candidates.in_progress exists)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS role_stats (
+            role TEXT PRIMARY KEY,
+            candidate_count INTEGER NOT NULL DEFAULT 0,
+            scored_count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            max_score REAL,
+            """ + ",\n".join(f"bucket_{i} INTEGER NOT NULL DEFAULT 0" for i in range(SCORE_BUCKETS)) + """
+        )
+        """,
+    ],
+    # 8: versioned job description registry (seeded from job_descriptions.JOBS) and rescoring queue
+    [
+        """
+        CREATE TABLE IF NOT EXISTS job_descriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            role TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            is_current INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT,
+            UNIQUE (role, version)
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_job_descriptions_current ON job_descriptions(role) WHERE is_current = 1",
+        """
+        CREATE TABLE IF NOT EXISTS rescore_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            role TEXT NOT NULL,
+            jd_version INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            total INTEGER,
+            processed INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT,
+            started_at TEXT,
+            updated_at TEXT,
+            finished_at TEXT,
+            error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_rescore_jobs_status ON rescore_jobs(status, id)",
+        # Rescoring walks one role's candidates in id order
+        "CREATE INDEX IF NOT EXISTS idx_candidates_role ON candidates(desired_positions, id)",
+        lambda conn: _add_column(conn, "candidates", "jd_version", "INTEGER"),
+        lambda conn: _seed_job_descriptions(conn),
+    ],
+    # 9: a role's top score is an index lookup, so rescoring can keep role_stats.max_score current
+    [
+        "CREATE INDEX IF NOT EXISTS idx_candidates_role_score ON candidates(desired_positions, match_score)",
+    ],
+    # 10: interviews still in progress are kept out of role_stats and the dashboard until finished
+    [
+        lambda conn: _add_column(conn, "candidates", "in_progress", "INTEGER NOT NULL DEFAULT 0"),
+        "UPDATE candidates SET in_progress = 1 WHERE candidate_summary = 'Interview In Progress'",
+        lambda conn: _refresh_role_stats(conn),
+    ],
+]
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+    columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _seed_job_descriptions(conn: sqlite3.Connection):
+    """Registers the built-in JDs as version 1; existing candidates were scored against that text."""
+    from job_descriptions import JOBS
+
+    now = datetime.utcnow().isoformat()
+    for role, content in JOBS.items():
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO job_descriptions (role, version, content, content_hash, is_current, created_at)
+            VALUES (?, 1, ?, ?, 1, ?)
+            """,
+            (role, content, _jd_hash(content), now)
+        )
+    conn.execute("""
+        UPDATE candidates SET jd_version = 1
+        WHERE jd_version IS NULL AND desired_positions IN (SELECT role FROM job_descriptions)
+    """)
+
+# Full-text Search
+_SEARCH_DOCUMENT_SQL = """
+    SELECT c.id, c.resume_text, c.tech_stack,
+           (SELECT group_concat(content, char(10)) FROM (
+                SELECT content FROM interview_messages WHERE candidate_id = c.id ORDER BY turn
+           ))
+    FROM candidates c
+"""
+
+def _populate_search_index(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM candidate_search")
+    conn.execute(f"INSERT INTO candidate_search (rowid, resume_text, tech_stack, transcript) {_SEARCH_DOCUMENT_SQL}")
+
+def _index_candidate(cursor: sqlite3.Cursor, candidate_id: int):
+    """Refreshes one candidate's search document; runs inside the caller's write transaction."""
+    cursor.execute("DELETE FROM candidate_search WHERE rowid = ?", (candidate_id,))
+    cursor.execute(
+        f"INSERT INTO candidate_search (rowid, resume_text, tech_stack, transcript) {_SEARCH_DOCUMENT_SQL} WHERE c.id = ?",
+        (candidate_id,)
+    )
+
+# Dashboard Aggregates
+# role_stats holds one row per desired_positions value ('' when unset), so the dashboard
+# header and per-role breakdown cost O(roles) however many candidates there are.
+# Candidates whose interview is still in progress aren't counted until it finishes.
+_BUCKET_COLUMNS = [f"bucket_{i}" for i in range(SCORE_BUCKETS)]
+_BUCKET_SQL = f"MIN(MAX(CAST(match_score * {SCORE_BUCKETS} AS INTEGER), 0), {SCORE_BUCKETS - 1})"
+
+def _score_bucket(score: float) -> int:
+    return min(max(int(score * SCORE_BUCKETS), 0), SCORE_BUCKETS - 1)
+
+def _refresh_role_stats(conn: sqlite3.Connection, role: str = None):
+    """Recomputes role_stats from the candidates table, for one role or all of them."""
+    where, params = ("AND COALESCE(desired_positions, '') = ?", (role,)) if role is not None else ("", ())
+    conn.execute(f"DELETE FROM role_stats {'WHERE role = ?' if role is not None else ''}", params)
+    buckets = ", ".join(f"SUM(CASE WHEN {_BUCKET_SQL} = {i} THEN 1 ELSE 0 END)" for i in range(SCORE_BUCKETS))
+    conn.execute(f"""
+        INSERT INTO role_stats (role, candidate_count, scored_count, score_sum, max_score, {", ".join(_BUCKET_COLUMNS)})
+        SELECT COALESCE(desired_positions, ''), COUNT(*), COUNT(match_score), COALESCE(SUM(match_score), 0),
+               MAX(match_score), {buckets}
+        FROM candidates WHERE in_progress = 0 {where}
+        GROUP BY COALESCE(desired_positions, '')
+    """, params)
+
+_ROLE_STATS_UPSERT_SQL = f"""
+    INSERT INTO role_stats (role, candidate_count, scored_count, score_sum, max_score, {", ".join(_BUCKET_COLUMNS)})
+    VALUES (?, 1, ?, ?, ?, {", ".join("?" * SCORE_BUCKETS)})
+    ON CONFLICT(role) DO UPDATE SET
+        candidate_count = candidate_count + 1,
+        scored_count = scored_count + excluded.scored_count,
+        score_sum = score_sum + excluded.score_sum,
+        max_score = CASE WHEN max_score IS NULL OR excluded.max_score > max_score
+                         THEN excluded.max_score ELSE max_score END,
+        {", ".join(f"{column} = {column} + excluded.{column}" for column in _BUCKET_COLUMNS)}
+"""
+
+def _update_role_stats(cursor: sqlite3.Cursor, role: str, score: float):
+    """Adds one new candidate to role_stats; runs inside the caller's write transaction."""
+    bucket = _score_bucket(score) if score is not None else None
+    buckets = [int(i == bucket) for i in range(SCORE_BUCKETS)]
+    cursor.execute(_ROLE_STATS_UPSERT_SQL, (role or "", int(score is not None), score or 0.0, score, *buckets))
+
+def _adjust_role_stats(conn: sqlite3.Connection, role: str, old_scores: list, new_scores: list):
+    """
+    Applies a change of scores for existing candidates to role_stats without re-aggregating the
+    role: counts, sums and buckets move by the difference, and max_score is one index lookup.
+    """
+    buckets = [0] * SCORE_BUCKETS
+    for score in new_scores:
+        if score is not None:
+            buckets[_score_bucket(score)] += 1
+    for score in old_scores:
+        if score is not None:
+            buckets[_score_bucket(score)] -= 1
+    scored = sum(score is not None for score in new_scores) - sum(score is not None for score in old_scores)
+    score_sum = sum(score for score in new_scores if score is not None) - sum(score for score in old_scores if score is not None)
+    conn.execute(f"""
+        UPDATE role_stats SET
+            scored_count = scored_count + ?,
+            score_sum = score_sum + ?,
+            max_score = (SELECT MAX(match_score) FROM candidates WHERE desired_positions = ? AND in_progress = 0),
+            {", ".join(f"{column} = {column} + ?" for column in _BUCKET_COLUMNS)}
+        WHERE role = ?
+    """, (scored, score_sum, role, *buckets, role))
+
+def _fts_query(text: str) -> str:
+    # Quote every term so user input can't be parsed as FTS5 syntax; terms are ANDed
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
 
 def init_db():
-    """Initializes the database and creates the candidates table if it doesn't exist."""
-    with sqlite3.connect(DB_FILE) as conn:
+    """Initializes the database and applies any pending schema migrations."""
+    global _migrated_path
+    if _migrated_path == DB_FILE:
+        return
+    with get_connection() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        with transaction() as conn:
+            # Re-check under the write lock in case another process migrated meanwhile
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+    _migrated_path = DB_FILE
+
+def _insert_candidate(cursor: sqlite3.Cursor, data: dict, in_progress: bool = False) -> int:
+    cursor.execute("""
+        INSERT INTO candidates (
+            full_name, email, phone, years_experience, desired_positions,
+            location, tech_stack, technical_answers, sentiment_analysis, submission_time,
+            resume_text, match_score, candidate_summary, jd_version, in_progress
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        data.get("full_name"),
+        data.get("email"),
+        data.get("phone"),
+        data.get("years_experience"),
+        data.get("desired_positions"),
+        data.get("location"),
+        data.get("tech_stack"),
+        json.dumps(data.get("technical_answers", {})),
+        data.get("sentiment_analysis"),
+        datetime.utcnow().isoformat(),
+        data.get("resume_text"),
+        data.get("match_score"),
+        data.get("candidate_summary"),
+        data.get("jd_version"),
+        int(in_progress)
+    ))
+    if not in_progress:
+        _update_role_stats(cursor, data.get("desired_positions"), data.get("match_score"))
+    return cursor.lastrowid
+
+def _enqueue_evaluation(cursor: sqlite3.Cursor, candidate_id: int):
+    cursor.execute(
+        "INSERT INTO evaluation_jobs (candidate_id, status, created_at) VALUES (?, 'pending', ?)",
+        (candidate_id, datetime.utcnow().isoformat())
+    )
+
+@metrics.timed("db.save_candidate")
+def save_candidate(data: dict) -> int:
+    """Saves a candidate's data (and any interview transcript) to the database and returns the new record ID."""
+    with transaction() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS candidates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                full_name TEXT,
-                email TEXT,
-                phone TEXT,
-                years_experience TEXT,
-                desired_positions TEXT,
-                location TEXT,
-                tech_stack TEXT,
-                technical_answers TEXT,
-                sentiment_analysis TEXT,
-                submission_time TEXT,
-                resume_text TEXT,
-                match_score REAL,
-                interview_transcript TEXT,
-                candidate_summary TEXT
+        candidate_id = _insert_candidate(cursor, data)
+        transcript = data.get("interview_transcript") or []
+        now = datetime.utcnow().isoformat()
+        cursor.executemany(
+            "INSERT INTO interview_messages (candidate_id, turn, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(candidate_id, turn, msg["role"], msg["content"], now) for turn, msg in enumerate(transcript)]
+        )
+        # Queue the interview for off-request-path evaluation in the same transaction
+        if transcript:
+            _enqueue_evaluation(cursor, candidate_id)
+        _index_candidate(cursor, candidate_id)
+        return candidate_id
+
+@metrics.timed("db.save_candidates_batch")
+def save_candidates_batch(records: list) -> list:
+    """
+    Saves many (candidate data, file_hash, path) records in a single transaction and marks
+    their files as ingested. Data may be None for files that yielded no candidate.
+    Returns the new record IDs (None where no candidate was saved).
+    """
+    candidate_ids = []
+    now = datetime.utcnow().isoformat()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        for data, file_hash, path in records:
+            candidate_id = None
+            if data is not None:
+                candidate_id = _insert_candidate(cursor, data)
+                _index_candidate(cursor, candidate_id)
+            cursor.execute(
+                "INSERT OR REPLACE INTO ingested_files (file_hash, path, candidate_id, ingested_at) VALUES (?, ?, ?, ?)",
+                (file_hash, path, candidate_id, now)
             )
-        """)
-        conn.commit()
+            candidate_ids.append(candidate_id)
+    return candidate_ids
 
-def save_candidate(data: dict) -> int:
-    """Saves a candidate's data to the database and returns the new record ID."""
-    with sqlite3.connect(DB_FILE) as conn:
+@metrics.timed("db.get_ingested_hashes")
+def get_ingested_hashes(file_hashes: list) -> set:
+    """Returns the subset of file hashes that have already been ingested."""
+    found = set()
+    with get_connection() as conn:
+        for start in range(0, len(file_hashes), 500):
+            batch = file_hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(f"SELECT file_hash FROM ingested_files WHERE file_hash IN ({placeholders})", batch)
+            found.update(row[0] for row in rows)
+    return found
+
+@metrics.timed("db.start_candidate")
+def start_candidate(data: dict) -> int:
+    """
+    Creates the candidate record when an interview begins, so that messages can be
+    appended turn by turn with append_interview_message. Returns the new record ID.
+    The record stays out of the dashboard's lists and aggregates until finish_candidate.
+    """
+    with transaction() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO candidates (
-                full_name, email, phone, years_experience, desired_positions,
-                location, tech_stack, technical_answers, sentiment_analysis, submission_time,
-                resume_text, match_score, interview_transcript, candidate_summary
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data.get("full_name"),
-            data.get("email"),
-            data.get("phone"),
-            data.get("years_experience"),
-            data.get("desired_positions"),
-            data.get("location"),
-            data.get("tech_stack"),
-            json.dumps(data.get("technical_answers", {})),
-            data.get("sentiment_analysis"),
-            datetime.utcnow().isoformat(),
-            data.get("resume_text"),
-            data.get("match_score"),
-            json.dumps(data.get("interview_transcript", [])),
-            data.get("candidate_summary")
-        ))
-        conn.commit()
-        return cursor.lastrowid
+        candidate_id = _insert_candidate(cursor, data, in_progress=True)
+        _index_candidate(cursor, candidate_id)
+        return candidate_id
+
+@metrics.timed("db.append_interview_message")
+def append_interview_message(candidate_id: int, role: str, content: str):
+    """Appends one interview turn; a single-row insert in its own (autocommit) transaction."""
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO interview_messages (candidate_id, turn, role, content, created_at)
+            SELECT ?, COALESCE(MAX(turn), -1) + 1, ?, ?, ? FROM interview_messages WHERE candidate_id = ?
+        """, (candidate_id, role, content, datetime.utcnow().isoformat(), candidate_id))
+
+@metrics.timed("db.finish_candidate")
+def finish_candidate(candidate_id: int, candidate_summary: str):
+    """
+    Marks a candidate's interview as finished, adds it to its role's aggregates and queues it
+    for evaluation. Returns the candidate's current match score (rescoring may have changed it).
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        row = cursor.execute(
+            "SELECT desired_positions, match_score, in_progress FROM candidates WHERE id = ?", (candidate_id,)
+        ).fetchone()
+        cursor.execute(
+            "UPDATE candidates SET candidate_summary = ?, in_progress = 0 WHERE id = ?", (candidate_summary, candidate_id)
+        )
+        if row is not None and row["in_progress"]:
+            _update_role_stats(cursor, row["desired_positions"], row["match_score"])
+        _enqueue_evaluation(cursor, candidate_id)
+        # The transcript is complete now, so it becomes searchable
+        _index_candidate(cursor, candidate_id)
+        return row["match_score"] if row is not None else None
 
+@metrics.timed("db.get_interview_messages")
+def get_interview_messages(candidate_id: int) -> list:
+    """Retrieves a candidate's interview transcript, in order, as a list of {"role", "content"} dicts."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT role, content FROM interview_messages WHERE candidate_id = ? ORDER BY turn",
+            (candidate_id,)
+        )
+        return [{"role": role, "content": content} for role, content in cursor.fetchall()]
+
+@metrics.timed("db.view_all_candidates")
 def view_all_candidates():
     """Retrieves all candidate records from the database."""
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.row_factory = sqlite3.Row 
+    with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM candidates ORDER BY submission_time DESC")
         return cursor.fetchall()
+
+@metrics.timed("db.list_candidates")
+def list_candidates(sort_by: str = "match_score", limit: int = 20, after: tuple = None):
+    """
+    Returns one page of finished candidates' summaries, highest score / newest first, using keyset
+    pagination: pass the returned cursor as `after` to get the next page.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort_by}")
+
+    # Ties are broken by id and NULLs come last. The page is read as consecutive ranges (rest of
+    # the cursor's tie group, smaller values, the NULL tail), each an index seek, so a page costs
+    # the same however deep it is; an OR of these in one WHERE would scan the index from the top.
+    if after is None:
+        ranges = [(f"{sort_by} IS NOT NULL", []), (f"{sort_by} IS NULL", [])]
+    elif after[0] is None:
+        ranges = [(f"{sort_by} IS NULL AND id < ?", [after[1]])]
+    else:
+        value, last_id = after
+        ranges = [
+            (f"{sort_by} = ? AND id < ?", [value, last_id]),
+            (f"{sort_by} < ?", [value]),  # also excludes NULLs
+            (f"{sort_by} IS NULL", []),
+        ]
+
+    rows = []
+    with get_connection() as conn:
+        for where, params in ranges:
+            rows += conn.execute(f"""
+                SELECT {", ".join(SUMMARY_COLUMNS)} FROM candidates
+                WHERE {where} AND in_progress = 0
+                ORDER BY {sort_by} DESC, id DESC
+                LIMIT ?
+            """, params + [limit + 1 - len(rows)]).fetchall()
+            if len(rows) > limit:
+                break
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1][sort_by], rows[-1]["id"])
+
+@metrics.timed("db.get_candidates_by_ids")
+def get_candidates_by_ids(candidate_ids: list):
+    """Retrieves candidate summaries for the given IDs, in the same order as the IDs; interviews in progress are left out."""
+    if not candidate_ids:
+        return []
+    placeholders = ",".join("?" * len(candidate_ids))
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM candidates WHERE id IN ({placeholders}) AND in_progress = 0",
+            list(candidate_ids)
+        )
+        rows = {row["id"]: row for row in cursor.fetchall()}
+    return [rows[candidate_id] for candidate_id in candidate_ids if candidate_id in rows]
+
+@metrics.timed("db.get_candidate_detail")
+def get_candidate_detail(candidate_id: int):
+    """Retrieves the large fields (resume, transcript, ratings) for one candidate."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(DETAIL_COLUMNS)} FROM candidates WHERE id = ?", (candidate_id,))
+        return cursor.fetchone()
+
+@metrics.timed("db.candidate_stats")
+def candidate_stats() -> dict:
+    """Returns the candidate count, and the average and top match score of the scored candidates."""
+    with get_connection() as conn:
+        total, scored, score_sum, max_score = conn.execute(
+            "SELECT COALESCE(SUM(candidate_count), 0), COALESCE(SUM(scored_count), 0), SUM(score_sum), MAX(max_score) FROM role_stats"
+        ).fetchone()
+        return {"total": total, "avg_score": score_sum / scored if scored else 0.0, "max_score": max_score or 0.0}
+
+@metrics.timed("db.get_role_stats")
+def get_role_stats() -> list:
+    """
+    Per-role count, average and top match score (over scored candidates) and score histogram (SCORE_BUCKETS counts),
+    largest roles first. Candidates without a desired position are reported under role ''.
+    """
+    with get_connection() as conn:
+        rows = conn.execute("SELECT * FROM role_stats ORDER BY candidate_count DESC, role").fetchall()
+    return [
+        {
+            "role": row["role"],
+            "count": row["candidate_count"],
+            "avg_score": row["score_sum"] / row["scored_count"] if row["scored_count"] else 0.0,
+            "max_score": row["max_score"] or 0.0,
+            "histogram": [row[column] for column in _BUCKET_COLUMNS],
+        }
+        for row in rows
+    ]
+
+def refresh_role_stats(role: str = None):
+    """
+    Recomputes role aggregates from the candidates table. Inserts keep them current;
+    call this after changing existing candidates' scores or roles (e.g. a rescoring pass).
+    """
+    with transaction() as conn:
+        _refresh_role_stats(conn, role)
+
+@metrics.timed("db.search_candidates")
+def search_candidates(query: str, limit: int = 20):
+    """
+    Full-text search over finished candidates' resumes, tech stacks and interview transcripts.
+    Returns candidate summaries ranked by BM25, each with a highlighted `snippet`.
+    """
+    fts_query = _fts_query(query)
+    if not fts_query:
+        return []
+    columns = ", ".join(f"c.{column}" for column in SUMMARY_COLUMNS)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {columns},
+                   snippet(candidate_search, -1, '**', '**', '…', 16) AS snippet
+            FROM candidate_search
+            JOIN candidates c ON c.id = candidate_search.rowid
+            WHERE candidate_search MATCH ? AND c.in_progress = 0
+            ORDER BY bm25(candidate_search)
+            LIMIT ?
+        """, (fts_query, limit))
+        return cursor.fetchall()
+
+def rebuild_search_index():
+    """Rebuilds the full-text index from the candidates and interview_messages tables."""
+    with transaction() as conn:
+        _populate_search_index(conn)
+
+@metrics.timed("db.get_candidate")
+def get_candidate(candidate_id: int):
+    """Retrieves a single candidate record by ID."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM candidates WHERE id = ?", (candidate_id,))
+        return cursor.fetchone()
+
+@metrics.timed("db.claim_evaluation_job")
+def claim_evaluation_job(max_attempts: int, lease_seconds: int = EVALUATION_LEASE_SECONDS):
+    """
+    Atomically marks the oldest pending evaluation job as running and returns it.
+    Jobs left 'running' by a crashed worker become claimable again once their lease expires,
+    unless they have used up `max_attempts`: a job that keeps killing its worker is marked
+    failed instead of being retried forever. Returns None if there is nothing to do.
+    """
+    now = datetime.utcnow()
+    lease_cutoff = (now - timedelta(seconds=lease_seconds)).isoformat()
+    # IMMEDIATE takes the write lock up front so two workers can't claim the same job
+    with transaction(immediate=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE evaluation_jobs
+            SET status = 'failed', finished_at = ?, error = 'Worker stopped during every attempt (lease expired)'
+            WHERE status = 'running' AND started_at < ? AND attempts >= ?
+        """, (now.isoformat(), lease_cutoff, max_attempts))
+        cursor.execute("""
+            SELECT id, candidate_id, attempts FROM evaluation_jobs
+            WHERE status = 'pending' OR (status = 'running' AND started_at < ? AND attempts < ?)
+            ORDER BY id LIMIT 1
+        """, (lease_cutoff, max_attempts))
+        job = cursor.fetchone()
+        if job is not None:
+            cursor.execute(
+                "UPDATE evaluation_jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (now.isoformat(), job["id"])
+            )
+        return job
+
+@metrics.timed("db.complete_evaluation_job")
+def complete_evaluation_job(job_id: int, candidate_id: int, sentiment_analysis: str, candidate_summary: str):
+    """Writes the evaluation back to the candidate and marks the job done, in one transaction."""
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE candidates SET sentiment_analysis = ?, candidate_summary = ? WHERE id = ?",
+            (sentiment_analysis, candidate_summary, candidate_id)
+        )
+        cursor.execute(
+            "UPDATE evaluation_jobs SET status = 'done', finished_at = ?, error = NULL WHERE id = ?",
+            (datetime.utcnow().isoformat(), job_id)
+        )
+
+@metrics.timed("db.fail_evaluation_job")
+def fail_evaluation_job(job_id: int, error: str, max_attempts: int):
+    """Returns a failed job to the queue, or marks it failed once it has used up its attempts."""
+    with transaction() as conn:
+        conn.execute("""
+            UPDATE evaluation_jobs
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                finished_at = ?, error = ?
+            WHERE id = ?
+        """, (max_attempts, datetime.utcnow().isoformat(), error, job_id))
+
+def get_evaluation_queue_stats() -> dict:
+    """Returns the number of evaluation jobs in each status."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, COUNT(*) FROM evaluation_jobs GROUP BY status")
+        return {status: count for status, count in cursor.fetchall()}
+
+# Job Description Registry
+def _jd_hash(content: str) -> str:
+    return hashlib.sha256(" ".join(content.split()).encode("utf-8")).hexdigest()
+
+@metrics.timed("db.get_current_job_descriptions")
+def get_current_job_descriptions() -> list:
+    """Returns the current (role, version, content, content_hash) row for every role, in the order roles were added."""
+    with get_connection() as conn:
+        return conn.execute("""
+            SELECT role, version, content, content_hash FROM job_descriptions jd
+            WHERE is_current = 1
+            ORDER BY (SELECT MIN(id) FROM job_descriptions WHERE role = jd.role)
+        """).fetchall()
+
+def get_job_descriptions() -> dict:
+    """Returns the current JD text for every role, {role: content}; the registry's replacement for JOBS."""
+    return {row["role"]: row["content"] for row in get_current_job_descriptions()}
+
+def get_current_job_description(role: str):
+    """Returns the current registry row (role, version, content, content_hash) for a role, or None."""
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT role, version, content, content_hash, created_at FROM job_descriptions WHERE role = ? AND is_current = 1",
+            (role,)
+        ).fetchone()
+
+def get_job_description_versions(role: str) -> list:
+    """Returns every stored version of a role's JD, newest first."""
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT version, content_hash, is_current, created_at FROM job_descriptions WHERE role = ? ORDER BY version DESC",
+            (role,)
+        ).fetchall()
+
+def get_registry_revision() -> int:
+    """A number that changes whenever any JD is added or edited (cheap to poll)."""
+    with get_connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM job_descriptions").fetchone()[0]
+
+@metrics.timed("db.save_job_description")
+def save_job_description(role: str, content: str) -> int:
+    """
+    Stores a new version of a role's JD and returns its version number. Unchanged text
+    (ignoring whitespace) is a no-op. Changing an existing role's JD queues a rescore job for
+    its candidates in the same transaction, superseding any rescore still pending for the role.
+    """
+    content_hash = _jd_hash(content)
+    now = datetime.utcnow().isoformat()
+    with transaction() as conn:
+        current = conn.execute(
+            "SELECT version, content_hash FROM job_descriptions WHERE role = ? AND is_current = 1", (role,)
+        ).fetchone()
+        if current is not None and current["content_hash"] == content_hash:
+            return current["version"]
+        version = current["version"] + 1 if current is not None else 1
+        conn.execute("UPDATE job_descriptions SET is_current = 0 WHERE role = ? AND is_current = 1", (role,))
+        conn.execute(
+            """
+            INSERT INTO job_descriptions (role, version, content, content_hash, is_current, created_at)
+            VALUES (?, ?, ?, ?, 1, ?)
+            """,
+            (role, version, content, content_hash, now)
+        )
+        if current is not None:
+            conn.execute(
+                "UPDATE rescore_jobs SET status = 'superseded', finished_at = ? WHERE role = ? AND status IN ('pending', 'running')",
+                (now, role)
+            )
+            conn.execute(
+                "INSERT INTO rescore_jobs (role, jd_version, status, created_at) VALUES (?, ?, 'pending', ?)",
+                (role, version, now)
+            )
+        return version
+
+# Rescore Queue
+def enqueue_stale_rescores(retry_seconds: int = RESCORE_RETRY_SECONDS) -> int:
+    """
+    Queues a rescore job for every role with candidates scored against an older JD version and no
+    job pending or running, e.g. candidates screened before an edit but saved after its rescore
+    finished. A role whose job failed recently is left alone for `retry_seconds`. Returns the jobs queued.
+    """
+    now = datetime.utcnow()
+    retry_cutoff = (now - timedelta(seconds=retry_seconds)).isoformat()
+    with transaction(immediate=True) as conn:
+        cursor = conn.execute("""
+            INSERT INTO rescore_jobs (role, jd_version, status, created_at)
+            SELECT jd.role, jd.version, 'pending', ? FROM job_descriptions jd
+            WHERE jd.is_current = 1
+              AND EXISTS (
+                  SELECT 1 FROM candidates c
+                  WHERE c.desired_positions = jd.role AND COALESCE(c.jd_version, 0) < jd.version
+              )
+              AND NOT EXISTS (
+                  SELECT 1 FROM rescore_jobs j
+                  WHERE j.role = jd.role
+                    AND (j.status IN ('pending', 'running') OR (j.status = 'failed' AND j.finished_at > ?))
+              )
+        """, (now.isoformat(), retry_cutoff))
+        return cursor.rowcount
+
+def claim_rescore_job(lease_seconds: int = RESCORE_LEASE_SECONDS):
+    """
+    Marks the oldest pending rescore job as running and returns it, counting how many candidates
+    it covers. Running jobs with no progress for `lease_seconds` are reclaimed. Returns None if idle.
+    """
+    now = datetime.utcnow()
+    lease_cutoff = (now - timedelta(seconds=lease_seconds)).isoformat()
+    with transaction(immediate=True) as conn:
+        job = conn.execute("""
+            SELECT id, role, jd_version FROM rescore_jobs
+            WHERE status = 'pending' OR (status = 'running' AND updated_at < ?)
+            ORDER BY id LIMIT 1
+        """, (lease_cutoff,)).fetchone()
+        if job is None:
+            return None
+        total = conn.execute(
+            "SELECT COUNT(*) FROM candidates WHERE desired_positions = ? AND COALESCE(jd_version, 0) < ?",
+            (job["role"], job["jd_version"])
+        ).fetchone()[0]
+        conn.execute(
+            """
+            UPDATE rescore_jobs SET status = 'running', total = ?, processed = 0, started_at = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (total, now.isoformat(), now.isoformat(), job["id"])
+        )
+        return {"id": job["id"], "role": job["role"], "jd_version": job["jd_version"], "total": total}
+
+def get_candidates_to_rescore(role: str, jd_version: int, limit: int) -> list:
+    """The next batch of a role's candidates whose score predates `jd_version`, as (id, resume_text) rows."""
+    with get_connection() as conn:
+        return conn.execute(
+            """
+            SELECT id, resume_text FROM candidates
+            WHERE desired_positions = ? AND COALESCE(jd_version, 0) < ?
+            ORDER BY id LIMIT ?
+            """,
+            (role, jd_version, limit)
+        ).fetchall()
+
+@metrics.timed("db.save_rescored_batch")
+def save_rescored_batch(job_id: int, role: str, jd_version: int, scores: list) -> bool:
+    """
+    Writes (candidate_id, match_score) pairs for one rescore batch, adjusts the role's
+    aggregates by the change in those scores and records progress, in one transaction.
+    Returns False (writing nothing) if the job was superseded by a newer edit in the meantime.
+    """
+    with transaction() as conn:
+        status = conn.execute("SELECT status FROM rescore_jobs WHERE id = ?", (job_id,)).fetchone()
+        if status is None or status["status"] != "running":
+            return False
+        new_scores = dict(scores)
+        # Old scores are read under the write lock; candidates moved to another role are skipped
+        rows = conn.execute(
+            f"SELECT id, match_score, desired_positions, in_progress FROM candidates WHERE id IN ({', '.join('?' * len(new_scores))})",
+            tuple(new_scores)
+        ).fetchall()
+        old_scores = {row["id"]: row["match_score"] for row in rows if row["desired_positions"] == role}
+        conn.executemany(
+            "UPDATE candidates SET match_score = ?, jd_version = ? WHERE id = ?",
+            [(new_scores[candidate_id], jd_version, candidate_id) for candidate_id in old_scores]
+        )
+        # Interviews in progress aren't in role_stats yet; finish_candidate adds their new score
+        counted = [row["id"] for row in rows if row["id"] in old_scores and not row["in_progress"]]
+        _adjust_role_stats(conn, role, [old_scores[candidate_id] for candidate_id in counted], [new_scores[candidate_id] for candidate_id in counted])
+        conn.execute(
+            "UPDATE rescore_jobs SET processed = processed + ?, updated_at = ? WHERE id = ?",
+            (len(scores), datetime.utcnow().isoformat(), job_id)
+        )
+        return True
+
+def finish_rescore_job(job_id: int, error: str = None):
+    """Marks a running rescore job done (or failed, with an error message)."""
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE rescore_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+            ("failed" if error else "done", error, datetime.utcnow().isoformat(), job_id)
+        )
+
+def get_rescore_jobs(limit: int = 10) -> list:
+    """The most recent rescore jobs with their progress, newest first."""
+    with get_connection() as conn:
+        return conn.execute(
+            """
+            SELECT id, role, jd_version, status, total, processed, created_at, finished_at, error
+            FROM rescore_jobs ORDER BY id DESC LIMIT ?
+            """,
+            (limit,)
+        ).fetchall()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Database maintenance commands.")
+    parser.add_argument("command", choices=["migrate", "rebuild-search", "refresh-role-stats"],
+                        help="migrate: apply pending schema migrations; rebuild-search: rebuild the full-text index; "
+                             "refresh-role-stats: recompute the dashboard's per-role aggregates")
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "rebuild-search":
+        rebuild_search_index()
+        print(f"Rebuilt the search index for {DB_FILE}")
+    elif args.command == "refresh-role-stats":
+        refresh_role_stats()
+        print(f"Recomputed role statistics for {DB_FILE}")
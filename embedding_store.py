@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+# Constants
+EMBEDDING_STORE_DTYPE = "float32"  # "int8" stores rows quantized, at a quarter of the size
+SCORE_BLOCK_ROWS = 16384  # rows scored per block, bounding temporary memory for int8 stores
+_INDEX_DTYPE = np.dtype([("id", "<i8"), ("scale", "<f4")])
+
+def store_path_for(db_file: str) -> str:
+    """The embedding store that lives next to a database file (candidates.db -> candidates.embeddings.*)."""
+    return os.path.splitext(db_file)[0] + ".embeddings"
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class EmbeddingStore:
+    """
+    Append-only matrix of L2-normalized embeddings keyed by integer ID, memory-mapped for reading.
+
+    Files, all prefixed with `path`:
+      .json     dimension, row dtype and the current generation of the two files below
+      .vectors  rows, float32 or int8 (int8 rows are scaled per row: value = int8 * scale)
+      .index    one (id, scale) record per row
+    Generation 0 uses those names; later generations are .<generation>.vectors and .<generation>.index.
+
+    Re-adding an ID appends a new row that supersedes the old one; compact() drops superseded rows
+    by writing the next generation and switching .json to it, so readers always see a matching pair.
+    Rows appended by other processes (e.g. the bulk ingestion CLI) are picked up on the next read.
+    """
+    def __init__(self, path: str, dtype: str = EMBEDDING_STORE_DTYPE):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self.generation = 0
+        self._meta_id = None  # (inode, mtime) of the .json last read
+        self._lock = threading.Lock()
+        self._reset()
+        self._load_meta()
+
+    def _reset(self):
+        self._generation = None  # generation the mapping was built from
+        self._rows = 0
+        self._vectors = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._latest = {}  # id -> row holding its current embedding
+        self._active = np.empty(0, dtype=bool)
+
+    def _file(self, suffix: str, generation: int = None) -> str:
+        generation = self.generation if generation is None else generation
+        return f"{self.path}.{generation}{suffix}" if generation else self.path + suffix
+
+    def _load_meta(self):
+        """Re-reads the .json if it changed since the last read (compact() replaces it)."""
+        try:
+            stat = os.stat(self.path + ".json")
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) == self._meta_id:
+            return
+        with open(self.path + ".json") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.generation = meta.get("generation", 0)
+        self._meta_id = (stat.st_ino, stat.st_mtime_ns)
+
+    def _write_meta(self, generation: int):
+        # Written aside and renamed over the old one, so readers see either generation, never a mix
+        with open(self.path + ".json.tmp", "w") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "generation": generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+    def _row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    def _complete_rows(self) -> int:
+        """Rows present in both files; an interrupted append may leave a partial tail."""
+        if self.dim is None:
+            return 0
+        indexed = os.path.getsize(self._file(".index")) // _INDEX_DTYPE.itemsize
+        stored = os.path.getsize(self._file(".vectors")) // self._row_bytes()
+        return min(indexed, stored)
+
+    def _refresh(self):
+        """Maps any rows appended since the last read. Must be called with the lock held."""
+        for attempt in range(3):
+            try:
+                return self._refresh_files()
+            except FileNotFoundError:
+                if not self._meta_changed():
+                    return  # the current generation has no rows yet
+                # compact() in another process removed the generation we had just read; re-read .json
+                if attempt == 2:
+                    raise
+
+    def _meta_changed(self) -> bool:
+        try:
+            stat = os.stat(self.path + ".json")
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) != self._meta_id
+
+    def _refresh_files(self):
+        self._load_meta()
+        if self.generation != self._generation:
+            # First read, or the files were rewritten by compact() (possibly in another process)
+            self._reset()
+            self._generation = self.generation
+        rows = self._complete_rows()
+        if not rows or rows == self._rows:
+            return
+        records = np.fromfile(self._file(".index"), dtype=_INDEX_DTYPE, count=rows)
+        vectors = np.memmap(self._file(".vectors"), dtype=self.dtype, mode="r", shape=(rows, self.dim))
+        self._ids = records["id"].astype(np.int64)
+        self._scales = records["scale"].astype(np.float32)
+        for row in range(self._rows, rows):
+            self._latest[int(self._ids[row])] = row
+        self._active = np.zeros(rows, dtype=bool)
+        self._active[list(self._latest.values())] = True
+        self._vectors = vectors
+        self._rows = rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._latest)
+
+    def __contains__(self, candidate_id: int) -> bool:
+        with self._lock:
+            self._refresh()
+            return candidate_id in self._latest
+
+    def get(self, ids: List[int]) -> Tuple[List[int], np.ndarray]:
+        """Current embeddings for those of `ids` that are stored: (found_ids, float32 rows)."""
+        with self._lock:
+            self._refresh()
+            found = [(candidate_id, self._latest[candidate_id]) for candidate_id in ids if candidate_id in self._latest]
+            vectors, scales = self._vectors, self._scales
+        if not found:
+            return [], np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = np.array([row for _, row in found])
+        matrix = np.asarray(vectors[rows], dtype=np.float32) * scales[rows, None]
+        return [candidate_id for candidate_id, _ in found], matrix
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.dtype == np.int8:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(self.dtype), np.ones(len(vectors), dtype=np.float32)
+
+    def add(self, ids: List[int], vectors):
+        """Appends embeddings (normalized here) for the given IDs."""
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        if not len(ids):
+            return
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per ID")
+
+        with self._lock:
+            self._load_meta()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta(self.generation)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store's {self.dim}")
+
+            rows, scales = self._encode(vectors)
+            records = np.empty(len(ids), dtype=_INDEX_DTYPE)
+            records["id"] = ids
+            records["scale"] = scales
+            with open(self._file(".index"), "ab") as index_file, open(self._file(".vectors"), "ab") as vector_file:
+                if fcntl is not None:
+                    fcntl.flock(index_file, fcntl.LOCK_EX)
+                try:
+                    # Drop any partial tail left by an interrupted append so the files stay aligned
+                    complete = self._complete_rows()
+                    index_file.truncate(complete * _INDEX_DTYPE.itemsize)
+                    vector_file.truncate(complete * self._row_bytes())
+                    # Vectors first: a row only becomes visible once its index record exists
+                    vector_file.write(rows.tobytes())
+                    vector_file.flush()
+                    index_file.write(records.tobytes())
+                    index_file.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(index_file, fcntl.LOCK_UN)
+
+    def score(self, queries) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine similarity of every stored embedding against each query vector, computed block by block.
+        Returns (ids, scores) where scores[i, j] is ids[i] vs queries[j].
+        """
+        queries = _normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        with self._lock:
+            self._refresh()
+            vectors, ids, scales, active, rows = self._vectors, self._ids, self._scales, self._active, self._rows
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(queries)), dtype=np.float32)
+
+        scores = np.empty((rows, len(queries)), dtype=np.float32)
+        for start in range(0, rows, SCORE_BLOCK_ROWS):
+            block = vectors[start:start + SCORE_BLOCK_ROWS]
+            if block.dtype == np.int8:
+                scores[start:start + len(block)] = (block.astype(np.float32) @ queries.T) * scales[start:start + len(block), None]
+            else:
+                scores[start:start + len(block)] = block @ queries.T
+        if active.all():
+            return ids, scores
+        return ids[active], scores[active]
+
+    def top_k(self, query, k: int = 10) -> List[Tuple[int, float]]:
+        """The k stored IDs most similar to one query vector, best first."""
+        ids, scores = self.score(query)
+        scores = scores[:, 0]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def compact(self) -> int:
+        """
+        Rewrites the files without superseded rows as the next generation and publishes it with one
+        rename of the .json. Returns the number of rows dropped. Readers in other processes switch
+        over on their next read; don't run it alongside another writer.
+        """
+        with self._lock:
+            self._refresh()
+            dropped = self._rows - len(self._latest)
+            if not dropped:
+                return 0
+            keep = np.flatnonzero(self._active)
+            records = np.empty(len(keep), dtype=_INDEX_DTYPE)
+            records["id"] = self._ids[keep]
+            records["scale"] = self._scales[keep]
+            rows = np.asarray(self._vectors[keep])
+
+            old, new = self.generation, self.generation + 1
+            for suffix, data in ((".vectors", rows), (".index", records)):
+                with open(self._file(suffix, new), "wb") as f:
+                    f.write(data.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._write_meta(new)
+            self._vectors = None
+            self._reset()
+            for suffix in (".vectors", ".index"):
+                try:
+                    os.remove(self._file(suffix, old))
+                except OSError:
+                    pass  # e.g. still mapped by a reader on Windows; harmless, nothing points to it
+            self._refresh()
+            return dropped
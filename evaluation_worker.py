@@ -0,0 +1,154 @@
+"""
+Background evaluation of completed interviews.
+
+save_candidate and finish_candidate queue an evaluation job for every finished interview. This worker
+claims jobs from the SQLite-backed queue, rates every question/answer pair in
+parallel with InterviewAgent.analyze_response, and writes the ratings
+(sentiment_analysis, as JSON) and an overall summary (candidate_summary) back.
+Jobs survive restarts: anything left 'running' by a dead worker is retried once
+its lease expires.
+
+Usage:
+    python evaluation_worker.py [--workers 4] [--once]
+    python evaluation_worker.py --stats
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import database as db
+import metrics
+from interview_agent import interview_agent
+
+EVALUATION_WORKERS = 4
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2  # seconds to sleep when the queue is empty
+REPORT_INTERVAL = 60  # seconds between throughput reports
+RATING_POINTS = {"Strong": 3, "Average": 2, "Weak": 1}
+
+def qa_pairs(transcript: List[Dict[str, str]]) -> List[Tuple[str, str]]:
+    """Pairs each interviewer message with the candidate answer that follows it."""
+    pairs = []
+    for message, reply in zip(transcript, transcript[1:]):
+        if message["role"] == "assistant" and reply["role"] == "user":
+            pairs.append((message["content"], reply["content"]))
+    return pairs
+
+def parse_rating(analysis: str) -> Tuple[str, str]:
+    """Splits an analyze_response result ("Rating: Reason") into its rating and reason."""
+    match = re.search(r"\b(Strong|Average|Weak)\b", analysis, re.IGNORECASE)
+    rating = match.group(1).title() if match else "Unrated"
+    reason = analysis.split(":", 1)[1].strip() if ":" in analysis else analysis
+    return rating, reason
+
+def summarize(ratings: List[str]) -> str:
+    points = [RATING_POINTS[r] for r in ratings if r in RATING_POINTS]
+    if not points:
+        return "Interview Completed (evaluation unavailable)"
+    mean = sum(points) / len(points)
+    overall = "Strong" if mean >= 2.5 else "Average" if mean >= 1.5 else "Weak"
+    counts = ", ".join(f"{ratings.count(r)} {r}" for r in RATING_POINTS if r in ratings)
+    return f"Overall: {overall} ({counts})"
+
+class EvaluationWorker:
+    def __init__(self, workers: int = EVALUATION_WORKERS):
+        self.workers = workers
+        # Q&A pairs from all jobs share one pool; the LLM client bounds actual concurrency
+        self.pair_executor = ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="qa-eval")
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.pairs_done = 0
+        self.started_at = time.perf_counter()
+
+    @metrics.timed("worker.evaluate")
+    def evaluate(self, candidate_id: int) -> Tuple[str, str, int]:
+        transcript = db.get_interview_messages(candidate_id)
+        pairs = qa_pairs(transcript)
+
+        analyses = list(self.pair_executor.map(lambda qa: interview_agent.analyze_response(*qa), pairs))
+        if pairs and all(a == "Analysis unavailable." for a in analyses):
+            raise RuntimeError("LLM unavailable for every answer")
+
+        evaluations = []
+        for (question, _), analysis in zip(pairs, analyses):
+            rating, reason = parse_rating(analysis)
+            evaluations.append({"question": question, "rating": rating, "reason": reason})
+        summary = summarize([e["rating"] for e in evaluations])
+        return json.dumps(evaluations), summary, len(pairs)
+
+    def process_one(self) -> bool:
+        """Claims and evaluates one job. Returns False if the queue was empty."""
+        job = db.claim_evaluation_job(MAX_ATTEMPTS)
+        if job is None:
+            return False
+        try:
+            sentiment, summary, n_pairs = self.evaluate(job["candidate_id"])
+            db.complete_evaluation_job(job["id"], job["candidate_id"], sentiment, summary)
+            with self.lock:
+                self.jobs_done += 1
+                self.pairs_done += n_pairs
+        except Exception as e:
+            print(f"Error evaluating candidate {job['candidate_id']}: {e}")
+            db.fail_evaluation_job(job["id"], str(e), MAX_ATTEMPTS)
+            with self.lock:
+                self.jobs_failed += 1
+        return True
+
+    def _loop(self, once: bool):
+        while not self.stop_event.is_set():
+            if not self.process_one():
+                if once:
+                    return
+                self.stop_event.wait(POLL_INTERVAL)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started_at
+        with self.lock:
+            print(
+                f"[evaluation] {self.jobs_done} jobs done, {self.jobs_failed} failed, {self.pairs_done} answers "
+                f"in {elapsed:.1f}s ({self.jobs_done / elapsed * 60:.1f} jobs/min, {self.pairs_done / elapsed:.2f} answers/s)"
+            )
+
+    def run(self, once: bool = False):
+        """Runs `workers` job loops until stopped (or, with once=True, until the queue is drained)."""
+        threads = [threading.Thread(target=self._loop, args=(once,), daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            last_report = time.perf_counter()
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+                if time.perf_counter() - last_report >= REPORT_INTERVAL:
+                    self.report()
+                    last_report = time.perf_counter()
+        except KeyboardInterrupt:
+            # Claimed jobs that don't finish are picked up again after their lease expires
+            self.stop_event.set()
+        finally:
+            self.pair_executor.shutdown(wait=False, cancel_futures=True)
+            self.report()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=EVALUATION_WORKERS, help="number of jobs evaluated concurrently")
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    parser.add_argument("--stats", action="store_true", help="print queue counts by status and exit")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    db.init_db()
+    if args.stats:
+        print(db.get_evaluation_queue_stats())
+        return
+    metrics.start_http_server(args.metrics_port)
+    EvaluationWorker(args.workers).run(once=args.once)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Bulk resume ingestion.
+
+Walks a directory for PDFs, extracts their text in a process pool, embeds them with
+batched embed_documents calls, scores every resume against every role's current JD, and
+saves each one under its best-fitting role in batched database transactions.
+Files are identified by content hash, so re-running skips anything already ingested.
+A file that fails to parse or exceeds the per-file timeout is left un-ingested and retried
+on the next run.
+
+Usage:
+    python ingest_resumes.py PATH/TO/RESUMES [--workers 4] [--batch-size 32]
+"""
+import argparse
+import concurrent.futures
+import os
+import time
+from typing import List, Tuple
+
+import database as db
+import pdf_extraction
+from rag_engine import rag_engine
+
+INGEST_WORKERS = os.cpu_count() or 1
+INGEST_BATCH_SIZE = 32
+
+def find_pdfs(directory: str) -> List[str]:
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+    return sorted(paths)
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return pdf_extraction.file_sha256(f.read())
+
+def parse_file(path: str) -> str:
+    """Worker: extracts one PDF's text with the same extraction code and page budget as RAGEngine.parse_pdf."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) > pdf_extraction.PDF_MAX_BYTES:
+        return ""
+    return pdf_extraction.extract_pdf_text(data)
+
+def name_from_path(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return " ".join(stem.replace("_", " ").replace("-", " ").split()).title()
+
+class Ingestor:
+    def __init__(self, batch_size: int = INGEST_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.ingested = 0
+        self.skipped_empty = 0
+        self.failed = 0
+        self.timings = {"parse": 0.0, "embed_score": 0.0, "write": 0.0}
+
+    def flush(self, batch: List[Tuple[str, str, str]]):
+        """Embeds, scores and saves one batch of (path, file_hash, text)."""
+        with_text = [item for item in batch if item[2].strip()]
+
+        started = time.perf_counter()
+        roles, scores = rag_engine.score_against_roles([text for _, _, text in with_text])
+        jd_versions = dict(rag_engine.jd_versions)  # the JD versions those scores were computed against
+        self.timings["embed_score"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        best = {}
+        for (path, _, text), row in zip(with_text, scores):
+            best_index = int(row.argmax())
+            best[path] = {
+                "full_name": name_from_path(path),
+                "desired_positions": roles[best_index],
+                "resume_text": text,
+                "match_score": float(row[best_index]),
+                "jd_version": jd_versions.get(roles[best_index]),
+                "candidate_summary": "Bulk Imported",
+            }
+        # Files without extractable text are still recorded so re-runs skip them
+        records = [(best.get(path), file_hash, path) for path, file_hash, _ in batch]
+        candidate_ids = db.save_candidates_batch(records)
+        rag_engine.index_resumes([
+            (candidate_id, data["resume_text"], data["desired_positions"], data["match_score"])
+            for candidate_id, (data, _, _) in zip(candidate_ids, records) if data is not None
+        ])
+        self.timings["write"] += time.perf_counter() - started
+
+        self.ingested += len(best)
+        self.skipped_empty += len(batch) - len(best)
+
+    def run(self, directory: str, workers: int = INGEST_WORKERS):
+        started = time.perf_counter()
+        paths = find_pdfs(directory)
+        hashes = {path: hash_file(path) for path in paths}
+        already = db.get_ingested_hashes(list(set(hashes.values())))
+
+        # Identical files under different names are only ingested once
+        pending, seen = [], set(already)
+        for path in paths:
+            if hashes[path] not in seen:
+                seen.add(hashes[path])
+                pending.append(path)
+        print(f"Found {len(paths)} PDF(s); {len(paths) - len(pending)} already ingested or duplicate, {len(pending)} to process")
+
+        batch = []
+        for path, text in self.parse(pending, workers):
+            batch.append((path, hashes[path], text))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+                self.report(started)
+        if batch:
+            self.flush(batch)
+        self.report(started, final=True)
+
+    def parse(self, paths: List[str], workers: int):
+        """
+        Yields (path, text) as files finish parsing. Each file gets PDF_TIMEOUT_SECONDS; a file that
+        overruns it or fails is counted as failed and not yielded, so it isn't recorded as ingested.
+        A stuck worker can't be stopped, so its pool is retired (see ExtractionPool) and a new one started.
+        """
+        pool = pdf_extraction.ExtractionPool(workers)
+        in_flight = {}  # future -> (path, deadline, owning pool)
+        queue = iter(paths)
+        try:
+            while True:
+                # At most `workers` files in flight, so each one starts parsing as soon as it's submitted
+                while len(in_flight) < workers:
+                    path = next(queue, None)
+                    if path is None:
+                        break
+                    if not pool.usable:
+                        pool = pdf_extraction.ExtractionPool(workers)
+                    deadline = time.monotonic() + pdf_extraction.PDF_TIMEOUT_SECONDS
+                    in_flight[pool.submit(parse_file, path)] = (path, deadline, pool)
+                if not in_flight:
+                    return
+
+                parse_started = time.perf_counter()
+                timeout = max(0.0, min(deadline for _, deadline, _ in in_flight.values()) - time.monotonic())
+                done, _ = concurrent.futures.wait(in_flight, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                self.timings["parse"] += time.perf_counter() - parse_started
+
+                for future in done:
+                    path, _, _ = in_flight.pop(future)
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        print(f"Error parsing {path}: {e}")
+                        self.failed += 1
+                        continue
+                    yield path, text
+
+                now = time.monotonic()
+                for future, (path, deadline, owner) in list(in_flight.items()):
+                    if deadline <= now:
+                        print(f"Parsing {path} exceeded {pdf_extraction.PDF_TIMEOUT_SECONDS}s; skipping it")
+                        del in_flight[future]
+                        self.failed += 1
+                        owner.abandon([future])
+        finally:
+            if pool.usable:
+                pool.executor.shutdown()
+
+    def report(self, started: float, final: bool = False):
+        elapsed = time.perf_counter() - started
+        processed = self.ingested + self.skipped_empty + self.failed
+        rate = processed / elapsed if elapsed else 0.0
+        print(f"{'Done' if final else 'Progress'}: {self.ingested} ingested, {self.skipped_empty} without text, "
+              f"{self.failed} failed (retried next run), {elapsed:.1f}s, {rate:.2f} docs/sec")
+        if final:
+            print("Time waiting on parsing: {parse:.1f}s, embedding+scoring: {embed_score:.1f}s, "
+                  "writing: {write:.1f}s".format(**self.timings))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory to scan (recursively) for PDF resumes")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="parser processes")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="resumes per embedding call and transaction")
+    args = parser.parse_args()
+
+    db.init_db()
+    Ingestor(args.batch_size).run(args.directory, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,50 @@
-import ollama
+import hashlib
 import json
-from typing import List, Dict
+import textwrap
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Iterator
+from cache import DiskCache
+from lazy import LazyProxy
+import metrics
+from llm_client import llm_client
+
+INTERVIEW_MODEL_NAME = "mistral:7b-instruct"
+PREFETCH_WORKERS = 4
+QUESTION_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+QUESTION_CACHE_MAX_ENTRIES = 1000
+PROMPT_EXCERPT_CHARS = 2000
+SESSION_HISTORY_TOKEN_BUDGET = 1500  # estimated tokens of recent turns sent verbatim
+SESSION_SUMMARY_BLOCK = 4  # messages (two question/answer exchanges) folded into the summary at a time
+SESSION_MIN_RECENT = 3  # messages always kept verbatim
+SESSION_SUMMARY_MAX_WORDS = 150
+CHARS_PER_TOKEN = 4  # rough estimate for English text; avoids a tokenizer dependency
+SESSION_INSTRUCTIONS = """
+The first message holds the Job Description, the candidate's Resume and, once the interview
+is under way, a summary of its earlier turns. Reply to each candidate answer with the next
+relevant follow-up question. If the answer was good, move to a new topic.
+Output ONLY the question text.
+"""
+
+_prefetch_executor = None
+_prefetch_lock = threading.Lock()
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    with _prefetch_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="question-prefetch")
+        return _prefetch_executor
 
 class InterviewAgent:
-    def __init__(self, model_name="mistral:7b-instruct"):
+    def __init__(self, model_name=INTERVIEW_MODEL_NAME, client=None):
         self.model_name = model_name
+        # All calls go through the shared, concurrency-limited client unless one is injected
+        self.client = client or llm_client
+        self.question_cache = DiskCache("initial_questions", max_entries=QUESTION_CACHE_MAX_ENTRIES, ttl=QUESTION_CACHE_TTL)
         self.system_prompt = """
         You are an expert Technical Interviewer. Your goal is to assess the candidate's fit for the role based on their Resume and the Job Description.
         
@@ -16,28 +56,47 @@ class InterviewAgent:
         5. After 4-5 questions, conclude the interview.
         """
 
+    def _question_cache_key(self, resume_excerpt: str, jd_excerpt: str, n: int) -> str:
+        payload = json.dumps([self.model_name, jd_excerpt, resume_excerpt, n])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @metrics.timed("agent.generate_initial_questions")
     def generate_initial_questions(self, resume_text: str, jd_text: str, n: int = 3) -> List[str]:
-        """Generates a list of initial questions based on the Resume and JD analysis."""
+        """
+        Generates a list of initial questions based on the Resume and JD analysis.
+        Successfully parsed results are cached, so retries for the same role skip the LLM.
+        """
+        jd_excerpt = jd_text[:PROMPT_EXCERPT_CHARS]
+        resume_excerpt = resume_text[:PROMPT_EXCERPT_CHARS]
+        cache_key = self._question_cache_key(resume_excerpt, jd_excerpt, n)
+        cached = self.question_cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
         prompt = f"""
         Analyze the following Resume and Job Description. Identify key gaps or areas that need verification.
         
         Job Description:
-        {jd_text[:2000]}
+        {jd_excerpt}
         
         Resume:
-        {resume_text[:2000]}
+        {resume_excerpt}
         
         Generate exactly {n} technical/behavioral questions to test these areas.
         Output ONLY a JSON array of strings, e.g., ["Question 1", "Question 2"].
         """
         try:
-            response = ollama.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}])
+            response = self.client.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}])
             content = response['message']['content']
             # Attempt to parse JSON
             start = content.find('[')
             end = content.rfind(']') + 1
             if start != -1 and end != -1:
-                return json.loads(content[start:end])
+                questions = json.loads(content[start:end])
+                # Only well-formed model output is cached, never the fallbacks below
+                if isinstance(questions, list) and questions and all(isinstance(q, str) for q in questions):
+                    self.question_cache.set(cache_key, json.dumps(questions))
+                return questions
             else:
                 # Fallback parsing
                 return [line.strip() for line in content.split('\n') if '?' in line][:n]
@@ -45,12 +104,15 @@ class InterviewAgent:
             print(f"Error generating questions: {e}")
             return ["Tell me about your most challenging project.", "How do you handle deadlines?"]
 
-    def generate_followup_question(self, history: List[Dict[str, str]], last_answer: str) -> str:
-        """Generates a follow-up question based on the conversation history."""
+    def prefetch_initial_questions(self, resume_text: str, jd_text: str, n: int = 3) -> Future:
+        """Starts generate_initial_questions on a background thread and returns its Future."""
+        return _get_prefetch_executor().submit(self.generate_initial_questions, resume_text, jd_text, n)
+
+    def _followup_prompt(self, history: List[Dict[str, str]], last_answer: str) -> str:
         # Construct context from history
         conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history[-4:]])
         
-        prompt = f"""
+        return f"""
         {self.system_prompt}
         
         Recent Conversation:
@@ -61,12 +123,38 @@ class InterviewAgent:
         Based on the answer, generate the next relevant follow-up question. If the answer was good, move to a new topic.
         Output ONLY the question text.
         """
+
+    @metrics.timed("agent.generate_followup_question")
+    def generate_followup_question(self, history: List[Dict[str, str]], last_answer: str) -> str:
+        """Generates a follow-up question based on the conversation history."""
+        prompt = self._followup_prompt(history, last_answer)
         try:
-            response = ollama.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}])
+            response = self.client.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}])
             return response['message']['content'].strip()
         except Exception:
             return "Could you elaborate on that?"
 
+    @metrics.timed("agent.stream_followup_question")
+    def stream_followup_question(self, history: List[Dict[str, str]], last_answer: str) -> Iterator[str]:
+        """Streaming variant of generate_followup_question: yields tokens as the model produces them."""
+        prompt = self._followup_prompt(history, last_answer)
+        emitted = False
+        try:
+            for chunk in self.client.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}], stream=True):
+                token = chunk['message']['content']
+                if token:
+                    emitted = True
+                    yield token
+        except Exception as e:
+            print(f"Error streaming follow-up question: {e}")
+        if not emitted:
+            yield "Could you elaborate on that?"
+
+    def start_session(self, resume_text: str, jd_text: str) -> "InterviewSession":
+        """Starts a multi-turn chat session for one candidate's interview."""
+        return InterviewSession(self, resume_text, jd_text)
+
+    @metrics.timed("agent.analyze_response")
     def analyze_response(self, question: str, answer: str) -> str:
         """Analyzes a single response for quality."""
         prompt = f"""
@@ -77,10 +165,125 @@ class InterviewAgent:
         Format: "Rating: Reason"
         """
         try:
-            response = ollama.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}])
+            response = self.client.chat(model=self.model_name, messages=[{"role": "user", "content": prompt}])
             return response['message']['content'].strip()
         except Exception:
             return "Analysis unavailable."
 
-# Singleton
-interview_agent = InterviewAgent()
+class InterviewSession:
+    """
+    One candidate's interview as a multi-turn chat, laid out so that consecutive prompts share
+    a long, unchanging prefix that Ollama can reuse instead of evaluating it again:
+
+      system               fixed interviewer instructions (identical for every candidate)
+      user                 JD and resume excerpts, plus the summary of folded-away turns
+      assistant/user ...   recent turns, verbatim
+
+    The resume and JD sit in the first user message rather than the system message because
+    some chat templates (Mistral's among them) move the system message next to the last turn.
+    Once the verbatim turns exceed the token budget, the oldest ones are folded into the
+    summary a block at a time, so the prefix only changes once per block and each prompt stays
+    about the same size however long the interview runs. Folding happens in the background
+    after each question, while the candidate answers; until it finishes, the turns being
+    folded are still sent verbatim, so no summarize call ever delays a question.
+    """
+    def __init__(self, agent: InterviewAgent, resume_text: str, jd_text: str,
+                 token_budget: int = SESSION_HISTORY_TOKEN_BUDGET):
+        self.agent = agent
+        self.token_budget = token_budget
+        self.system_prompt = textwrap.dedent(agent.system_prompt).strip() + "\n" + SESSION_INSTRUCTIONS
+        self.context = f"Job Description:\n{jd_text[:PROMPT_EXCERPT_CHARS]}\n\nResume:\n{resume_text[:PROMPT_EXCERPT_CHARS]}"
+        self.summary = ""
+        self.history = []
+        self.folded = 0  # messages folded into the summary so far
+        self._folding = None  # Future of the fold in progress, if any
+        self._lock = threading.Lock()
+
+    def add_message(self, role: str, content: str):
+        with self._lock:
+            self.history.append({"role": role, "content": content})
+        if role == "assistant":
+            # A question was just asked: fold while the candidate is answering
+            self._start_fold()
+
+    def messages(self) -> List[Dict[str, str]]:
+        """The chat request for the next question: summary of folded turns, then the rest verbatim."""
+        with self._lock:
+            opening = self.context
+            if self.summary:
+                opening += f"\n\nSummary of the interview so far:\n{self.summary}"
+            return [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": opening}] + list(self.history)
+
+    def _start_fold(self):
+        """Starts summarizing the oldest block in the background if the verbatim turns are over budget."""
+        with self._lock:
+            if (self._folding is not None
+                    or sum(estimate_tokens(msg["content"]) for msg in self.history) <= self.token_budget
+                    or len(self.history) - SESSION_SUMMARY_BLOCK < SESSION_MIN_RECENT):
+                return
+            block = self.history[:SESSION_SUMMARY_BLOCK]
+            self._folding = _get_prefetch_executor().submit(self._summarize, self.summary, block)
+        self._folding.add_done_callback(self._finish_fold)
+
+    def _finish_fold(self, future: Future):
+        with self._lock:
+            # New turns are only ever appended, so the folded block is still at the front
+            self.summary = future.result()
+            del self.history[:SESSION_SUMMARY_BLOCK]
+            self.folded += SESSION_SUMMARY_BLOCK
+            self._folding = None
+        # One long answer can put the history more than a block over budget
+        self._start_fold()
+
+    @metrics.timed("agent.summarize_history")
+    def _summarize(self, summary: str, block: List[Dict[str, str]]) -> str:
+        """Returns `summary` updated with `block`; never raises, so a fold always completes."""
+        transcript = "\n".join(
+            f"{'Interviewer' if msg['role'] == 'assistant' else 'Candidate'}: {msg['content']}" for msg in block
+        )
+        prompt = f"""
+        Update the running summary of a technical interview with the exchange below.
+        Keep the topics covered, the candidate's concrete claims, and any vague or weak answers.
+        Output ONLY the updated summary, in at most {SESSION_SUMMARY_MAX_WORDS} words.
+
+        Current summary:
+        {summary or "(none yet)"}
+
+        New exchange:
+        {transcript}
+        """
+        try:
+            response = self.agent.client.chat(model=self.agent.model_name, messages=[{"role": "user", "content": prompt}])
+            updated = response['message']['content'].strip()
+        except Exception as e:
+            print(f"Error summarizing interview history: {e}")
+            updated = ""
+        # Without a summary, keep the most recent part of the raw text rather than dropping the turns
+        return updated or f"{summary}\n{transcript}".strip()[-SESSION_SUMMARY_MAX_WORDS * 8:]
+
+    @metrics.timed("agent.session_followup")
+    def next_question(self) -> str:
+        """Generates the next question; the candidate's answer must already be added."""
+        try:
+            response = self.agent.client.chat(model=self.agent.model_name, messages=self.messages())
+            return response['message']['content'].strip()
+        except Exception:
+            return "Could you elaborate on that?"
+
+    @metrics.timed("agent.stream_session_followup")
+    def stream_next_question(self) -> Iterator[str]:
+        """Streaming variant of next_question: yields tokens as the model produces them."""
+        emitted = False
+        try:
+            for chunk in self.agent.client.chat(model=self.agent.model_name, messages=self.messages(), stream=True):
+                token = chunk['message']['content']
+                if token:
+                    emitted = True
+                    yield token
+        except Exception as e:
+            print(f"Error streaming follow-up question: {e}")
+        if not emitted:
+            yield "Could you elaborate on that?"
+
+# Singleton; built on first use
+interview_agent = LazyProxy(InterviewAgent)
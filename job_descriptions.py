@@ -1,4 +1,6 @@
 # job_descriptions.py
+# Seed content for the versioned JD registry (database.job_descriptions), loaded as version 1
+# by the migration. Edit JDs from the Recruiter Dashboard; changes here are not picked up later.
 
 JOBS = {
     "Senior Full Stack Engineer": """
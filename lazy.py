@@ -0,0 +1,37 @@
+import threading
+
+class LazyProxy:
+    """
+    Stands in for a module-level singleton that is expensive to build.
+    The factory runs once, thread-safely, on first attribute access; after that,
+    attribute access is forwarded to the real instance.
+    """
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _lazy_get(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                # Another thread may have finished initialization while we waited
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def _lazy_initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_get(), name, value)
+
+    def __repr__(self):
+        if self._instance is None:
+            return f"<LazyProxy for {self._factory!r} (not initialized)>"
+        return repr(self._instance)
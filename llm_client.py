@@ -0,0 +1,286 @@
+import asyncio
+import collections
+import threading
+import time
+import weakref
+from lazy import LazyProxy
+import metrics
+
+# Constants
+LLM_HOST = None  # None lets the ollama client read OLLAMA_HOST
+LLM_MAX_CONCURRENCY = 2
+LLM_MAX_QUEUE = 32
+LLM_TIMEOUT = 120  # seconds, applied to every request made through the client
+LLM_QUEUE_TIMEOUT = 60  # seconds a call may wait for a free slot
+LLM_KEEP_ALIVE = 30 * 60  # seconds Ollama keeps a model (and its prompt cache) loaded after a request
+LATENCY_SAMPLES = 1000
+
+class LLMQueueFullError(RuntimeError):
+    """Raised when the request queue is at capacity (backpressure)."""
+
+class LLMQueueTimeoutError(TimeoutError):
+    """Raised when a request waited longer than its queue timeout for a free slot."""
+
+def _wake(waiter):
+    if isinstance(waiter, threading.Event):
+        waiter.set()
+    else:
+        loop, future = waiter
+        loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+class _FairLimiter:
+    """
+    A FIFO concurrency limiter shared by threads and asyncio tasks.
+    Slots are handed directly to the longest-waiting caller, so a burst of new
+    requests can't starve ones that are already queued.
+    """
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.max_depth = 0
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _acquire_or_enqueue(self, waiter) -> bool:
+        with self._lock:
+            if self.active < self.max_concurrency and not self._waiters:
+                self.active += 1
+                return True
+            if len(self._waiters) >= self.max_queue:
+                raise LLMQueueFullError(f"LLM request queue is full ({self.max_queue} waiting)")
+            self._waiters.append(waiter)
+            self.max_depth = max(self.max_depth, len(self._waiters))
+            return False
+
+    def _abandon(self, waiter) -> bool:
+        """Removes a waiter that gave up. Returns False if it was granted a slot in the meantime."""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def acquire(self, timeout: float = None):
+        waiter = threading.Event()
+        if self._acquire_or_enqueue(waiter):
+            return
+        if waiter.wait(timeout):
+            return
+        if self._abandon(waiter):
+            raise LLMQueueTimeoutError(f"No LLM slot became free within {timeout}s")
+        # The slot was handed over just as we timed out; keep it
+
+    async def acquire_async(self, timeout: float = None):
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        if self._acquire_or_enqueue(waiter):
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), timeout)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                raise LLMQueueTimeoutError(f"No LLM slot became free within {timeout}s")
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the next waiter; `active` is unchanged
+                _wake(self._waiters.popleft())
+            else:
+                self.active -= 1
+
+class LLMClient:
+    """
+    Shared, pooled access to the Ollama server.
+    One HTTP client (with connection reuse) per process, at most `max_concurrency`
+    requests in flight, a bounded FIFO queue behind them, and per-request timeouts.
+    """
+    def __init__(self, host: str = LLM_HOST, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_queue: int = LLM_MAX_QUEUE, timeout: float = LLM_TIMEOUT,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT, keep_alive: int = LLM_KEEP_ALIVE):
+        self.host = host
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.queue_timeout = queue_timeout
+        self._limiter = _FairLimiter(max_concurrency, max_queue)
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._client_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self._counters = collections.Counter()
+        self._wait_times = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                import ollama
+
+                self._client = ollama.Client(host=self.host, timeout=self.timeout)
+            return self._client
+
+    def _get_async_client(self):
+        # httpx async clients are bound to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                import ollama
+
+                client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+                self._async_clients[loop] = client
+            return client
+
+    def _count(self, name: str):
+        metrics.inc(f"llm_{name}")
+        with self._metrics_lock:
+            self._counters[name] += 1
+
+    def _before_acquire(self) -> float:
+        self._count("requests")
+        return time.perf_counter()
+
+    def _after_acquire(self, queued_at: float) -> float:
+        started_at = time.perf_counter()
+        metrics.observe("llm.queue_wait", started_at - queued_at)
+        with self._metrics_lock:
+            self._wait_times.append(started_at - queued_at)
+        return started_at
+
+    def _finish(self, started_at: float, error: bool):
+        self._limiter.release()
+        latency = time.perf_counter() - started_at
+        metrics.observe("llm.chat", latency, error)
+        with self._metrics_lock:
+            self._latencies.append(latency)
+            self._counters["errors" if error else "completed"] += 1
+        metrics.inc("llm_errors" if error else "llm_completed")
+
+    def _acquire(self, queue_timeout: float = None) -> float:
+        queued_at = self._before_acquire()
+        try:
+            self._limiter.acquire(self.queue_timeout if queue_timeout is None else queue_timeout)
+        except LLMQueueFullError:
+            self._count("rejected")
+            raise
+        except LLMQueueTimeoutError:
+            self._count("queue_timeouts")
+            raise
+        return self._after_acquire(queued_at)
+
+    async def _acquire_async(self, queue_timeout: float = None) -> float:
+        queued_at = self._before_acquire()
+        try:
+            await self._limiter.acquire_async(self.queue_timeout if queue_timeout is None else queue_timeout)
+        except LLMQueueFullError:
+            self._count("rejected")
+            raise
+        except LLMQueueTimeoutError:
+            self._count("queue_timeouts")
+            raise
+        return self._after_acquire(queued_at)
+
+    @metrics.timed("llm.preload")
+    def preload(self, model: str, embedding: bool = False, keep_alive: int = None):
+        """
+        Loads a model into Ollama's memory, or refreshes how long it stays there, by sending an
+        empty request. Deliberately bypasses the concurrency limit so a warm-up that has to wait
+        for a model to load from disk never holds a slot that interviews are queued for.
+        """
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if embedding:
+            self._get_client().embed(model=model, input="", keep_alive=keep_alive)
+        else:
+            self._get_client().generate(model=model, prompt="", keep_alive=keep_alive)
+
+    def chat(self, model: str, messages: list, stream: bool = False, queue_timeout: float = None, **kwargs):
+        """Same contract as ollama.chat, but queued behind the shared concurrency limit."""
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        if stream:
+            return self._stream_chat(model, messages, queue_timeout, kwargs)
+        started_at = self._acquire(queue_timeout)
+        error = True
+        try:
+            response = self._get_client().chat(model=model, messages=messages, **kwargs)
+            error = False
+            return response
+        finally:
+            self._finish(started_at, error)
+
+    def _stream_chat(self, model, messages, queue_timeout, kwargs):
+        # The slot is taken on first iteration and held until the stream ends or is closed
+        started_at = self._acquire(queue_timeout)
+        error = True
+        try:
+            for chunk in self._get_client().chat(model=model, messages=messages, stream=True, **kwargs):
+                yield chunk
+            error = False
+        finally:
+            self._finish(started_at, error)
+
+    async def achat(self, model: str, messages: list, stream: bool = False, queue_timeout: float = None, **kwargs):
+        """asyncio variant of chat(); shares the same limit and queue as synchronous callers."""
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        if stream:
+            return self._astream_chat(model, messages, queue_timeout, kwargs)
+        started_at = await self._acquire_async(queue_timeout)
+        error = True
+        try:
+            response = await self._get_async_client().chat(model=model, messages=messages, **kwargs)
+            error = False
+            return response
+        finally:
+            self._finish(started_at, error)
+
+    async def _astream_chat(self, model, messages, queue_timeout, kwargs):
+        started_at = await self._acquire_async(queue_timeout)
+        error = True
+        try:
+            async for chunk in await self._get_async_client().chat(model=model, messages=messages, stream=True, **kwargs):
+                yield chunk
+            error = False
+        finally:
+            self._finish(started_at, error)
+
+    @staticmethod
+    def _percentile(samples, q: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def metrics(self) -> dict:
+        """Queue depth, throughput counters and wait/latency percentiles (seconds)."""
+        with self._metrics_lock:
+            wait_times = list(self._wait_times)
+            latencies = list(self._latencies)
+            counters = dict(self._counters)
+        return {
+            "in_flight": self._limiter.active,
+            "queue_depth": self._limiter.queue_depth,
+            "max_queue_depth": self._limiter.max_depth,
+            "max_concurrency": self._limiter.max_concurrency,
+            "requests": counters.get("requests", 0),
+            "completed": counters.get("completed", 0),
+            "errors": counters.get("errors", 0),
+            "rejected": counters.get("rejected", 0),
+            "queue_timeouts": counters.get("queue_timeouts", 0),
+            "wait_p50": self._percentile(wait_times, 0.5),
+            "wait_p95": self._percentile(wait_times, 0.95),
+            "latency_p50": self._percentile(latencies, 0.5),
+            "latency_p95": self._percentile(latencies, 0.95),
+        }
+
+# Singleton shared by every InterviewAgent in the process
+llm_client = LazyProxy(LLMClient)
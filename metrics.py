@@ -0,0 +1,214 @@
+import bisect
+import contextlib
+import functools
+import inspect
+import os
+import threading
+import time
+
+# Constants
+METRICS_ENABLED = os.environ.get("TALENTHUNT_METRICS", "1").lower() not in ("0", "false", "no", "off")
+METRICS_PORT = int(os.environ.get("TALENTHUNT_METRICS_PORT", "0"))  # 0 disables the /metrics endpoint
+METRICS_PREFIX = "talenthunt"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower  # +Inf bucket: the best estimate is its lower bound
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """
+    In-process counters and per-operation latency histograms.
+    Operations are named "<layer>.<call>" (e.g. "rag.parse_pdf", "db.save_candidate").
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._errors = {}
+
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, operation: str, seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = _Histogram()
+            histogram.observe(seconds)
+            if error:
+                self._errors[operation] = self._errors.get(operation, 0) + 1
+
+    @contextlib.contextmanager
+    def timer(self, operation: str):
+        started = time.perf_counter()
+        error = True
+        try:
+            yield
+            error = False
+        finally:
+            self.observe(operation, time.perf_counter() - started, error)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._errors.clear()
+
+    def snapshot(self) -> dict:
+        """Counters plus count/mean/p50/p95/p99/errors (seconds) per operation."""
+        with self._lock:
+            operations = {
+                name: {
+                    "count": h.count,
+                    "mean": h.sum / h.count if h.count else 0.0,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                    "total": h.sum,
+                    "errors": self._errors.get(name, 0),
+                }
+                for name, h in sorted(self._histograms.items())
+            }
+            return {"counters": dict(sorted(self._counters.items())), "operations": operations}
+
+    def prometheus_text(self) -> str:
+        """Renders everything in the Prometheus text exposition format."""
+        family = f"{METRICS_PREFIX}_operation_duration_seconds"
+        lines = []
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                metric = f"{METRICS_PREFIX}_{_metric_name(name)}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            if self._histograms:
+                lines.append(f"# HELP {family} Latency of instrumented operations.")
+                lines.append(f"# TYPE {family} histogram")
+            for name, h in sorted(self._histograms.items()):
+                label = f'operation="{name}"'
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{family}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{family}_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f"{family}_sum{{{label}}} {h.sum}")
+                lines.append(f"{family}_count{{{label}}} {h.count}")
+            if self._errors:
+                errors = f"{METRICS_PREFIX}_operation_errors_total"
+                lines.append(f"# TYPE {errors} counter")
+                lines += [f'{errors}{{operation="{name}"}} {count}' for name, count in sorted(self._errors.items())]
+        return "\n".join(lines) + "\n"
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+# Process-wide registry; Streamlit pages share it because they run in one process
+registry = MetricsRegistry()
+_null_timer = contextlib.nullcontext()
+
+def inc(name: str, amount: int = 1):
+    if METRICS_ENABLED:
+        registry.inc(name, amount)
+
+def observe(operation: str, seconds: float, error: bool = False):
+    if METRICS_ENABLED:
+        registry.observe(operation, seconds, error)
+
+def timer(operation: str):
+    """Context manager that records the block's duration under `operation`."""
+    return registry.timer(operation) if METRICS_ENABLED else _null_timer
+
+def timed(operation: str):
+    """
+    Decorator that records each call's duration under `operation`.
+    Generator functions are timed until they are exhausted or closed.
+    When metrics are disabled the function is returned undecorated, so there is no overhead.
+    """
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                with registry.timer(operation):
+                    yield from fn(*args, **kwargs)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with registry.timer(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def snapshot() -> dict:
+    return registry.snapshot()
+
+def prometheus_text() -> str:
+    return registry.prometheus_text()
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_http_server(port: int = None):
+    """
+    Serves prometheus_text() at /metrics on a daemon thread (once per process).
+    Does nothing unless a port is given or TALENTHUNT_METRICS_PORT is set.
+    """
+    global _server
+    port = port or METRICS_PORT
+    if not port or not METRICS_ENABLED:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        except OSError as e:
+            print(f"Error starting metrics server on port {port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-http").start()
+        return _server
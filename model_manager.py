@@ -0,0 +1,153 @@
+"""
+Ollama model warm-up and keep-alive.
+
+Loading the interview and embedding models from disk can take tens of seconds, which
+used to land on the first candidate after an idle period. The model manager preloads
+both models when the app starts, then re-sends a keep-alive ping every few minutes
+during business hours so they stay resident. Outside those hours models are left to
+unload, and the next visitor's portal page triggers a fresh warm-up.
+
+Readiness per model is one of: cold, loading, ready, failed.
+
+Usage:
+    python model_manager.py            # preload both models once and report timings
+    python model_manager.py --watch    # keep them warm until interrupted (e.g. as a service)
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from interview_agent import INTERVIEW_MODEL_NAME
+from llm_client import llm_client
+from rag_engine import EMBEDDING_MODEL_NAME
+
+# Constants
+MODEL_HEARTBEAT_INTERVAL = 10 * 60  # seconds between keep-alive pings; must be below LLM_KEEP_ALIVE
+WARM_HOURS = os.environ.get("TALENTHUNT_WARM_HOURS", "8-20")  # local time, start-end; "0-24" for always
+WARM_WEEKDAYS = (0, 1, 2, 3, 4)  # Monday to Friday
+MODELS = {INTERVIEW_MODEL_NAME: False, EMBEDDING_MODEL_NAME: True}  # name -> is an embedding model
+
+def _parse_hours(hours: str):
+    start, end = hours.split("-")
+    return int(start), int(end)
+
+class ModelManager:
+    """Preloads the app's models, keeps them loaded during business hours and tracks their readiness."""
+    def __init__(self, models: dict = None, heartbeat_interval: float = MODEL_HEARTBEAT_INTERVAL,
+                 warm_hours: str = WARM_HOURS, warm_weekdays=WARM_WEEKDAYS):
+        self.models = dict(MODELS if models is None else models)
+        self.heartbeat_interval = heartbeat_interval
+        self.warm_hours = _parse_hours(warm_hours)
+        self.warm_weekdays = warm_weekdays
+        self._state = {
+            name: {"state": "cold", "loaded_at": None, "load_seconds": None, "error": None}
+            for name in self.models
+        }
+        self._changed = threading.Condition()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def in_business_hours(self, now: datetime = None) -> bool:
+        now = now or datetime.now()
+        start, end = self.warm_hours
+        return now.weekday() in self.warm_weekdays and start <= now.hour < end
+
+    def _set(self, name: str, **fields):
+        with self._changed:
+            self._state[name].update(fields)
+            self._changed.notify_all()
+
+    def preload(self, name: str):
+        """Loads one model (or refreshes its keep-alive), recording how long it took."""
+        self._set(name, state="loading", error=None)
+        started = time.perf_counter()
+        try:
+            llm_client.preload(name, embedding=self.models[name])
+        except Exception as e:
+            print(f"Error preloading model {name}: {e}")
+            metrics.inc("model_preload_errors")
+            self._set(name, state="failed", error=str(e))
+            return
+        self._set(name, state="ready", loaded_at=time.time(), load_seconds=time.perf_counter() - started)
+
+    def preload_all(self):
+        # One thread per model: Ollama loads them independently, so the wait is the slower of the two
+        threads = [threading.Thread(target=self.preload, args=(name,), daemon=True) for name in self.models]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def status(self) -> dict:
+        """Readiness per model. A model not pinged within the keep-alive window is reported cold again."""
+        with self._changed:
+            status = {name: dict(state) for name, state in self._state.items()}
+        for state in status.values():
+            if state["state"] == "ready" and time.time() - state["loaded_at"] > llm_client.keep_alive:
+                state["state"] = "cold"
+        return status
+
+    def is_ready(self) -> bool:
+        return all(state["state"] == "ready" for state in self.status().values())
+
+    def wait_until_ready(self, timeout: float) -> bool:
+        """Blocks until every model is ready or failed, or `timeout` seconds pass. Returns is_ready()."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while any(state["state"] in ("cold", "loading") for state in self.status().values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return self.is_ready()
+
+    def _run(self):
+        while True:
+            woken = self._wakeup.wait(self.heartbeat_interval)
+            self._wakeup.clear()
+            if woken or self.in_business_hours():
+                self.preload_all()
+
+    def start(self):
+        """
+        Starts the heartbeat thread (once per process) and, if any model isn't ready, a warm-up.
+        Cheap enough to call on every page load.
+        """
+        with self._changed:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="model-heartbeat")
+                self._thread.start()
+                self._wakeup.set()
+                return
+        status = self.status().values()
+        if not any(state["state"] == "loading" for state in status) and not all(state["state"] == "ready" for state in status):
+            self._wakeup.set()
+
+# Process-wide manager; Streamlit pages share it because they run in one process
+model_manager = ModelManager()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--watch", action="store_true", help="keep the models warm until interrupted")
+    args = parser.parse_args()
+
+    model_manager.preload_all()
+    for name, state in model_manager.status().items():
+        if state["state"] == "ready":
+            print(f"{name}: ready in {state['load_seconds']:.1f}s")
+        else:
+            print(f"{name}: {state['state']} ({state['error']})")
+    if args.watch:
+        hours = "-".join(str(hour) for hour in model_manager.warm_hours)
+        print(f"Pinging every {MODEL_HEARTBEAT_INTERVAL}s on weekdays between {hours}h; Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(model_manager.heartbeat_interval)
+                if model_manager.in_business_hours():
+                    model_manager.preload_all()
+        except KeyboardInterrupt:
+            pass
@@ -3,27 +3,37 @@ import streamlit as st
 import json
 import sys
 import os
+import hashlib
+import importlib.util
 
 # Add the parent directory to the path to import the database module
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import database as db
+import metrics
 from rag_engine import rag_engine
 from interview_agent import interview_agent
-from job_descriptions import JOBS
+from model_manager import model_manager
+import rescoring
 from typing import List
 
 MATCH_THRESHOLD = 0.4  # Lowered for demo purposes
+SCREENING_CACHE_TTL = 24 * 60 * 60  # seconds
+SCREENING_CACHE_MAX_ENTRIES = 500
+MODEL_WARMUP_WAIT = 90  # seconds an upload waits for the models to finish loading
 
-# Check for Ollama
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+# Check for Ollama without importing it on page load
+OLLAMA_AVAILABLE = importlib.util.find_spec("ollama") is not None
 
 # Page Config
 st.set_page_config(page_title="Candidate Portal", page_icon="🚀")
+metrics.start_http_server()  # no-op unless TALENTHUNT_METRICS_PORT is set
+model_manager.start()  # warms the models up again if they were unloaded during a quiet period
 db.init_db()
+rescoring.start_background_rescorer()  # no-op once running; rescores candidates saved against an older JD
+# Current JD per role, from the versioned registry (editable on the Recruiter Dashboard).
+# One snapshot per run: screening scores, caches and records exactly these versions.
+jd_rows = {row["role"]: row for row in db.get_current_job_descriptions()}
+jobs = {role: row["content"] for role, row in jd_rows.items()}
 
 # Hide Sidebar
 st.markdown("""
@@ -35,17 +45,28 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Session State Setup
+def cancel_question_prefetch():
+    """Drops this session's background question generation; a running one is left to finish and discarded."""
+    prefetch = st.session_state.pop("question_prefetch", None)
+    if prefetch:
+        prefetch["future"].cancel()
+
 def reset_session():
+    cancel_question_prefetch()
     st.session_state.stage = "registration" # Start with registration
     st.session_state.candidate_data = {}
     st.session_state.conversation = [] 
     st.session_state.resume_text = ""
     st.session_state.match_score = 0.0
     st.session_state.questions_queue = []
+    st.session_state.interview_session = None
     st.session_state.current_question = ""
     st.session_state.question_count = 0
     st.session_state.max_questions = 5
-    st.session_state.selected_role = list(JOBS.keys())[0]
+    st.session_state.candidate_id = None
+    st.session_state.selected_role = list(jobs.keys())[0]
+    st.session_state.jd_version = None
+    st.session_state.jd_text = ""
     # Registration fields
     st.session_state.reg_name = ""
     st.session_state.reg_email = ""
@@ -60,6 +81,77 @@ if 'stage' not in st.session_state:
 # Helper Functions
 def append_message(role: str, text: str):
     st.session_state.conversation.append({"role": role, "content": text})
+    if st.session_state.get("interview_session"):
+        st.session_state.interview_session.add_message(role, text)
+    # Persist each turn as it happens so a crash doesn't lose the transcript
+    if st.session_state.get("candidate_id"):
+        db.append_interview_message(st.session_state.candidate_id, role, text)
+
+def candidate_profile() -> dict:
+    return {
+        "full_name": st.session_state.reg_name,
+        "email": st.session_state.reg_email,
+        "phone": st.session_state.reg_phone,
+        "years_experience": st.session_state.reg_exp,
+        "location": st.session_state.reg_loc,
+        "tech_stack": st.session_state.reg_tech,
+        "desired_positions": st.session_state.selected_role,
+        "resume_text": st.session_state.resume_text,
+        "match_score": st.session_state.match_score,
+        # Lets a later JD edit find and rescore this candidate
+        "jd_version": st.session_state.jd_version,
+    }
+
+def uploaded_file_hash(uploaded_file) -> str:
+    """Hashes an upload once; later reruns reuse the hash stored for its file_id."""
+    cached = st.session_state.get("uploaded_file_hash")
+    if cached and cached[0] == uploaded_file.file_id:
+        return cached[1]
+    file_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    st.session_state.uploaded_file_hash = (uploaded_file.file_id, file_hash)
+    return file_hash
+
+def start_question_prefetch(screening_key: tuple, resume_text: str, jd_text: str):
+    """Starts generating the initial interview questions as soon as a resume passes screening."""
+    prefetch = st.session_state.get("question_prefetch")
+    if prefetch and prefetch["key"] == screening_key:
+        return
+    cancel_question_prefetch()
+    st.session_state.question_prefetch = {
+        "key": screening_key,
+        "future": interview_agent.prefetch_initial_questions(resume_text, jd_text, n=3),
+    }
+
+@st.cache_data(
+    ttl=SCREENING_CACHE_TTL,
+    max_entries=SCREENING_CACHE_MAX_ENTRIES,
+    show_spinner="Analyzing your resume against the Job Description...",
+)
+def screen_resume(file_hash: str, role: str, jd_version: int, _uploaded_file, _jd_text: str) -> dict:
+    """
+    Parses and scores a resume against version `jd_version` of a role's JD, whose text is passed in
+    rather than re-read, so the score and the cache key always describe the same JD. Memoized per
+    (file hash, role, JD version) across reruns and sessions, so button clicks after an upload don't
+    re-parse or re-embed anything, while an edited JD gets a fresh score.
+    """
+    # 1. Parse PDF
+    resume_text = rag_engine.parse_pdf(_uploaded_file)
+    if not resume_text:
+        # Raising keeps unreadable/timed-out uploads out of the cache
+        raise ValueError("No text could be extracted from the resume")
+    
+    # 2. Add JD to Store
+    rag_engine.add_jd_to_store(_jd_text, jd_id=role)
+    
+    # 3. Calculate Score
+    score = rag_engine.calculate_match_score(resume_text, _jd_text)
+    
+    # 4. Other roles, ranked from the same (cached) resume embedding
+    other_roles = [
+        (other_role, role_score) for other_role, role_score in rag_engine.rank_roles(resume_text)
+        if other_role != role and role_score >= MATCH_THRESHOLD and role_score > score
+    ]
+    return {"resume_text": resume_text, "score": score, "other_roles": other_roles}
 
 # UI
 st.title("AI Screening Test")
@@ -93,57 +185,92 @@ if st.session_state.stage == "registration":
 # Stage 1: Resume Upload
 elif st.session_state.stage == "resume_upload":
     st.info(f"Welcome, {st.session_state.reg_name}. Please select a role and upload your Resume (PDF).")
+    if not model_manager.is_ready():
+        st.caption("⏳ Our AI interviewer is warming up; it will be ready by the time you've uploaded your resume.")
     
     # Role Selection
-    selected_role = st.selectbox("Select Role", list(JOBS.keys()), index=list(JOBS.keys()).index(st.session_state.selected_role))
+    roles = list(jobs.keys())
+    selected_role = st.selectbox("Select Role", roles, index=roles.index(st.session_state.selected_role) if st.session_state.selected_role in roles else 0)
     st.session_state.selected_role = selected_role
     
     # Display JD Preview
     with st.expander("View Job Description"):
-        st.markdown(JOBS[selected_role])
+        st.markdown(jobs[selected_role])
 
     uploaded_file = st.file_uploader("Upload Resume", type=["pdf"])
     
     if uploaded_file is not None:
-        with st.spinner("Analyzing your resume against the Job Description..."):
-            # 1. Parse PDF
-            resume_text = rag_engine.parse_pdf(uploaded_file)
-            st.session_state.resume_text = resume_text
-            
-            # 2. Add JD to Store
-            current_jd_text = JOBS[selected_role]
-            rag_engine.add_jd_to_store(current_jd_text)
-            
-            # 3. Calculate Score
-            score = rag_engine.calculate_match_score(resume_text, current_jd_text)
-            st.session_state.match_score = score
-            
-            # 4. Decision
-            if score >= MATCH_THRESHOLD:
-                st.success(f"Resume Screened Successfully! Match Score: {score:.2f}")
-                st.balloons()
-                if st.button("Proceed to Interview"):
-                    st.session_state.stage = "interview_start"
-                    st.rerun()
-            else:
-                st.error(f"Resume Match Score: {score:.2f}. Unfortunately, your profile does not meet the minimum requirements.")
+        if not model_manager.is_ready():
+            with st.spinner("Warming up the AI models. This only happens after a quiet period..."):
+                ready = model_manager.wait_until_ready(MODEL_WARMUP_WAIT)
+            if not ready and not any(state["state"] == "failed" for state in model_manager.status().values()):
+                st.warning("The AI models are still loading. Please try again in a minute.")
                 if st.button("Try Again"):
-                    st.session_state.stage = "registration" # Go back to start or just upload again?
                     st.rerun()
+                st.stop()
+        jd = jd_rows[selected_role]
+        screening_key = (uploaded_file_hash(uploaded_file), selected_role, jd["version"])
+        try:
+            screening = screen_resume(*screening_key, uploaded_file, jd["content"])
+        except ValueError:
+            st.error("We couldn't read any text from this PDF. Please upload a text-based (not scanned) resume.")
+            st.stop()
+        resume_text = screening["resume_text"]
+        score = screening["score"]
+        other_roles = screening["other_roles"]
+        st.session_state.resume_text = resume_text
+        st.session_state.match_score = score
+        st.session_state.jd_version = jd["version"]
+        st.session_state.jd_text = jd["content"]
+        st.session_state.screening_key = screening_key
+        
+        # Decision
+        if score >= MATCH_THRESHOLD:
+            # Questions are generated in the background while the candidate reads the result
+            start_question_prefetch(screening_key, resume_text, jd["content"])
+            st.success(f"Resume Screened Successfully! Match Score: {score:.2f}")
+            st.balloons()
+            if st.button("Proceed to Interview"):
+                st.session_state.stage = "interview_start"
+                st.rerun()
+        else:
+            # A prefetch for a previously selected role is no longer needed
+            cancel_question_prefetch()
+            st.error(f"Resume Match Score: {score:.2f}. Unfortunately, your profile does not meet the minimum requirements.")
+            if st.button("Try Again"):
+                st.session_state.stage = "registration" # Go back to start or just upload again?
+                st.rerun()
+
+        if other_roles:
+            suggestions = ", ".join(f"**{role}** ({role_score:.2f})" for role, role_score in other_roles)
+            st.info(f"Your profile may be a better fit for: {suggestions}")
 
 # Stage 2: Interview Initialization
 elif st.session_state.stage == "interview_start":
     with st.spinner("AI Interviewer is preparing questions based on your profile..."):
-        # Generate initial questions based on RAG analysis
-        current_jd_text = JOBS[st.session_state.selected_role]
-        initial_qs = interview_agent.generate_initial_questions(
-            st.session_state.resume_text, 
-            current_jd_text, 
-            n=3
-        )
+        # Generate initial questions based on RAG analysis, reusing the background
+        # generation started at screening time if it belongs to this resume and role
+        prefetch = st.session_state.pop("question_prefetch", None)
+        if prefetch and prefetch["key"] == st.session_state.get("screening_key") and not prefetch["future"].cancelled():
+            initial_qs = prefetch["future"].result()
+        else:
+            initial_qs = interview_agent.generate_initial_questions(
+                st.session_state.resume_text, 
+                st.session_state.jd_text, 
+                n=3
+            )
         st.session_state.questions_queue = initial_qs
         
-        # Start the conversation
+        # Create the candidate record now; the transcript is appended turn by turn
+        if not st.session_state.get("candidate_id"):
+            st.session_state.candidate_id = db.start_candidate(
+                {**candidate_profile(), "candidate_summary": "Interview In Progress"}
+            )
+        
+        # Start the conversation; follow-ups are generated in one chat session per interview
+        st.session_state.interview_session = interview_agent.start_session(
+            st.session_state.resume_text, st.session_state.jd_text
+        )
         intro_msg = f"Hello {st.session_state.reg_name}! I've reviewed your resume. Let's dive into your experience. " + initial_qs[0]
         st.session_state.current_question = initial_qs[0]
         st.session_state.questions_queue.pop(0)
@@ -173,39 +300,43 @@ elif st.session_state.stage == "interview_active":
             append_message("assistant", finish_msg)
             st.session_state.stage = "finished"
             
-            # Save Data
+            # Save Data (the transcript is already stored turn by turn)
             st.session_state.candidate_data = {
-                "full_name": st.session_state.reg_name,
-                "email": st.session_state.reg_email,
-                "phone": st.session_state.reg_phone,
-                "years_experience": st.session_state.reg_exp,
-                "location": st.session_state.reg_loc,
-                "tech_stack": st.session_state.reg_tech,
-                "desired_positions": st.session_state.selected_role,
-                "resume_text": st.session_state.resume_text,
-                "match_score": st.session_state.match_score,
+                **candidate_profile(),
                 "interview_transcript": [
                     {"role": m["role"], "content": m["content"]} 
                     for m in st.session_state.conversation
                 ],
                 "candidate_summary": "Interview Completed"
             }
-            db.save_candidate(st.session_state.candidate_data)
+            match_score = db.finish_candidate(st.session_state.candidate_id, "Interview Completed")
+            # Make the resume semantically searchable now that the interview is complete;
+            # its embedding is cached from screening
+            try:
+                rag_engine.index_resume(
+                    st.session_state.candidate_id,
+                    st.session_state.resume_text,
+                    st.session_state.selected_role,
+                    match_score
+                )
+            except Exception as e:
+                print(f"Error indexing resume: {e}")
             st.rerun()
             
         else:
-            with st.spinner("Thinking..."):
-                if st.session_state.questions_queue:
-                    next_q = st.session_state.questions_queue.pop(0)
-                else:
-                    next_q = interview_agent.generate_followup_question(
-                        st.session_state.conversation, 
-                        user_input
-                    )
-                
-                st.session_state.current_question = next_q
-                append_message("assistant", next_q)
-                st.rerun()
+            with st.chat_message("user"):
+                st.markdown(user_input)
+            
+            if st.session_state.questions_queue:
+                next_q = st.session_state.questions_queue.pop(0)
+            else:
+                # Render tokens as they arrive instead of waiting behind a spinner
+                with st.chat_message("assistant"):
+                    next_q = st.write_stream(st.session_state.interview_session.stream_next_question()).strip()
+            
+            st.session_state.current_question = next_q
+            append_message("assistant", next_q)
+            st.rerun()
 
 # Stage 4: Finished
 elif st.session_state.stage == "finished":
@@ -1,6 +1,5 @@
 # pages/02_Recruiter_Dashboard.py
 import streamlit as st
-import pandas as pd
 import json
 import sys
 import os
@@ -8,8 +7,15 @@ import os
 # Add parent directory to path to import database module
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import database as db
+import metrics
+from rag_engine import rag_engine
+from interview_agent import interview_agent
+from llm_client import llm_client
+from model_manager import model_manager
+import rescoring
 
 st.set_page_config(page_title="Recruiter Dashboard", layout="wide", page_icon="👔")
+metrics.start_http_server()  # no-op unless TALENTHUNT_METRICS_PORT is set
 
 # Hide Sidebar
 st.markdown("""
@@ -45,58 +51,269 @@ if not st.session_state.admin_logged_in:
 st.title("Recruiter Dashboard")
 st.write("View all candidate profiles saved to the database.")
 
-records = db.view_all_candidates()
+db.init_db()
+rescoring.start_background_rescorer()  # no-op once running; resumes rescores queued before a restart
+jobs = db.get_job_descriptions()
 
-if not records:
-    st.warning("No candidate submissions found in the database yet.")
-else:
-    data_for_df = [dict(row) for row in records]
-    df = pd.DataFrame(data_for_df)
+PAGE_SIZE = 20
+SEMANTIC_SEARCH_K = 20
+BEST_FIT_K = 50
+SORT_OPTIONS = {"match_score": "Match Score", "submission_time": "Submission Time"}
+
+def render_candidate_details(candidate_id: int):
+    """Fetches and renders the resume and transcript for one candidate on demand."""
+    detail = db.get_candidate_detail(candidate_id)
+    if detail is None:
+        st.write("Candidate not found.")
+        return
+
+    st.write("**Resume Summary:**")
+    st.caption((detail['resume_text'] or '')[:500] + "...")
+    
+    st.divider()
+    st.write("**Interview Transcript:**")
+    transcript = db.get_interview_messages(candidate_id)
+    if transcript:
+        for msg in transcript:
+            role_icon = "🤖" if msg['role'] == "assistant" else "👤"
+            st.write(f"{role_icon} **{msg['role'].title()}:** {msg['content']}")
+    elif detail['interview_transcript']:
+        # Legacy blob that the transcript migration couldn't parse
+        st.write("No transcript available or invalid format.")
+    else:
+        st.write("No interview conducted.")
+    
+    # Per-answer ratings written by evaluation_worker.py
+    evaluations = detail['sentiment_analysis']
+    if evaluations:
+        try:
+            st.write("**Answer Ratings:**")
+            for evaluation in json.loads(evaluations):
+                st.write(f"- **{evaluation['rating']}**: {evaluation['question']} — {evaluation['reason']}")
+        except (ValueError, KeyError, TypeError):
+            st.write(evaluations)
+
+def render_candidate(rank: int, row):
+    score = row['match_score'] or 0.0
+    with st.expander(f"#{rank} | {row['full_name']} | Score: {score:.2f}"):
+        c1, c2 = st.columns(2)
+        with c1:
+            st.write(f"**Email:** {row['email']}")
+            st.write(f"**Phone:** {row['phone']}")
+            st.write(f"**Experience:** {row['years_experience']}")
+        with c2:
+            st.write(f"**Role:** {row['desired_positions']}")
+            st.write(f"**Tech Stack:** {row['tech_stack']}")
+            st.write(f"**Evaluation:** {row['candidate_summary']}")
+        
+        # Expander bodies run on every rerun, so the large fields are only loaded on request
+        if st.checkbox("Show resume & transcript", key=f"details_{row['id']}"):
+            render_candidate_details(row['id'])
+
+@st.fragment(run_every=5)
+def render_system_metrics():
+    """Live latency/throughput panel for this server process; refreshes on its own every few seconds."""
+    if not metrics.METRICS_ENABLED:
+        st.info("Instrumentation is disabled (TALENTHUNT_METRICS=0).")
+        return
     
-    # Ensure new columns exist (handle old DB records if any)
-    if 'match_score' not in df.columns:
-        df['match_score'] = 0.0
+    snapshot = metrics.snapshot()
+    if snapshot["operations"]:
+        st.write("**Operation latency** (ms, p50/p95 estimated from histogram buckets)")
+        st.dataframe([
+            {
+                "operation": name,
+                "calls": op["count"],
+                "errors": op["errors"],
+                "mean": round(op["mean"] * 1000, 1),
+                "p50": round(op["p50"] * 1000, 1),
+                "p95": round(op["p95"] * 1000, 1),
+                "total (s)": round(op["total"], 2),
+            }
+            for name, op in snapshot["operations"].items()
+        ], hide_index=True, use_container_width=True)
+    else:
+        st.caption("No instrumented calls yet in this process.")
     
-    # Sort by Match Score
-    df = df.sort_values(by='match_score', ascending=False)
+    # Only report on singletons that already exist; building them here would skew the numbers
+    llm_col, cache_col = st.columns(2)
+    with llm_col:
+        st.write("**Models**")
+        for name, state in model_manager.status().items():
+            detail = f" (loaded in {state['load_seconds']:.1f}s)" if state['load_seconds'] is not None else ""
+            if state['state'] == "failed":
+                detail = f" ({state['error']})"
+            st.write(f"{name}: {state['state']}{detail}")
+        st.write("**LLM queue**")
+        if llm_client._lazy_initialized():
+            llm = llm_client.metrics()
+            st.write(
+                f"{llm['in_flight']}/{llm['max_concurrency']} in flight, {llm['queue_depth']} queued "
+                f"(max {llm['max_queue_depth']}), {llm['completed']} completed, {llm['errors']} errors, "
+                f"{llm['rejected']} rejected"
+            )
+            st.write(f"Wait p50/p95: {llm['wait_p50']:.2f}s / {llm['wait_p95']:.2f}s — "
+                     f"latency p50/p95: {llm['latency_p50']:.2f}s / {llm['latency_p95']:.2f}s")
+        else:
+            st.caption("No LLM calls yet.")
+    with cache_col:
+        st.write("**Caches**")
+        caches = []
+        if rag_engine._lazy_initialized():
+            caches += [("Embeddings", rag_engine.embeddings.stats()), ("PDF text", rag_engine.pdf_text_cache.stats())]
+        if interview_agent._lazy_initialized():
+            caches.append(("Initial questions", interview_agent.question_cache.stats()))
+        for name, cache_stats in caches:
+            st.write(f"{name}: {cache_stats['entries']} entries, {cache_stats['hit_rate']:.0%} hit rate "
+                     f"({cache_stats['hits']} hits / {cache_stats['misses']} misses)")
+        if not caches:
+            st.caption("No caches in use yet.")
     
+    st.download_button("Download Prometheus metrics", metrics.prometheus_text(),
+                       file_name="metrics.prom", mime="text/plain")
+
+with st.expander("System Performance"):
+    render_system_metrics()
+
+@st.fragment(run_every=2)
+def render_rescore_progress():
+    """Progress of the background rescoring queued by JD edits; refreshes on its own."""
+    rescore_jobs = db.get_rescore_jobs(limit=5)
+    if not rescore_jobs:
+        st.caption("No rescoring runs yet.")
+        return
+    for job in rescore_jobs:
+        label = f"{job['role']} v{job['jd_version']}: {job['status']}"
+        if job['status'] in ("running", "done") and job['total']:
+            st.progress(min(job['processed'] / job['total'], 1.0), text=f"{label} ({job['processed']}/{job['total']})")
+        elif job['status'] == "failed":
+            st.write(f"{label} — {job['error']}")
+        else:
+            st.write(label)
+
+with st.expander("Job Descriptions"):
+    jd_role = st.selectbox("Role", list(jobs.keys()), key="jd_role")
+    current_jd = db.get_current_job_description(jd_role)
+    st.caption(f"Version {current_jd['version']}, saved {current_jd['created_at'][:16].replace('T', ' ')} UTC")
+    jd_text = st.text_area("Job description", current_jd['content'], height=300, key=f"jd_text_{jd_role}_{current_jd['version']}")
+    if st.button("Save new version", disabled=jd_text.strip() == current_jd['content'].strip()):
+        version = db.save_job_description(jd_role, jd_text)
+        # Candidates who applied for this role are rescored against the new version in the background
+        rescoring.start_background_rescorer(wake=True)
+        st.toast(f"Saved {jd_role} v{version}; rescoring its candidates.")
+        st.rerun()
+    versions = db.get_job_description_versions(jd_role)
+    if len(versions) > 1:
+        st.caption("History: " + ", ".join(f"v{row['version']} ({row['created_at'][:10]})" for row in versions))
+    render_rescore_progress()
+
+stats = db.candidate_stats()
+
+if not stats["total"]:
+    st.warning("No candidate submissions found in the database yet.")
+else:
     # Display Metrics
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Candidates", len(df))
-    col2.metric("Avg Match Score", f"{df['match_score'].mean():.2f}")
-    col3.metric("Top Candidate Score", f"{df['match_score'].max():.2f}")
-    
+    col1.metric("Total Candidates", stats["total"])
+    col2.metric("Avg Match Score", f"{stats['avg_score']:.2f}")
+    col3.metric("Top Candidate Score", f"{stats['max_score']:.2f}")
+
+    with st.expander("Breakdown by Role"):
+        st.dataframe([
+            {
+                "Role": role_stats["role"] or "Unspecified",
+                "Candidates": role_stats["count"],
+                "Avg Match Score": round(role_stats["avg_score"], 2),
+                "Top Score": round(role_stats["max_score"], 2),
+                "Score Distribution (0 → 1)": role_stats["histogram"],
+            }
+            for role_stats in db.get_role_stats()
+        ], column_config={
+            "Score Distribution (0 → 1)": st.column_config.BarChartColumn(y_min=0),
+        }, hide_index=True, use_container_width=True)
+
     st.divider()
     
+    # Keyword (full-text) or semantic (resume embedding) search
+    search_col, mode_col, role_col = st.columns([3, 1, 2])
+    with search_col:
+        search_query = st.text_input("Search candidates", placeholder="e.g. Terraform, Kubernetes, distributed systems with Go")
+    with mode_col:
+        search_mode = st.radio("Search mode", ["Keyword", "Semantic"])
+    with role_col:
+        role_filter = st.selectbox("Role", ["All roles"] + list(jobs.keys()), disabled=search_mode != "Semantic")
+    
+    if search_query.strip():
+        if search_mode == "Keyword":
+            results = db.search_candidates(search_query)
+        else:
+            try:
+                matches = rag_engine.search_resumes(
+                    search_query, k=SEMANTIC_SEARCH_K, role=None if role_filter == "All roles" else role_filter
+                )
+            except Exception as e:
+                st.error(f"Semantic search is unavailable: {e}")
+                st.stop()
+            similarities = dict(matches)
+            results = db.get_candidates_by_ids([candidate_id for candidate_id, _ in matches])
+        
+        st.subheader(f"Search Results ({len(results)})")
+        if not results:
+            st.info("No candidates match your search.")
+        for rank, row in enumerate(results, start=1):
+            if search_mode == "Keyword":
+                st.markdown(f"> {row['snippet']}")
+            else:
+                st.caption(f"Semantic similarity: {similarities[row['id']]:.2f}")
+            render_candidate(rank, row)
+        st.stop()
+    
     # Detailed View
     st.subheader("Candidate Rankings")
+
+    # Re-rank every stored resume against any role, not just the one the candidate applied for
+    fit_role = st.selectbox("Best fit for role", ["Any (stored match score)"] + list(jobs.keys()))
+    if fit_role in jobs:
+        try:
+            matches = rag_engine.rank_candidates_for_role(fit_role, k=BEST_FIT_K)
+        except Exception as e:
+            st.error(f"Role ranking is unavailable: {e}")
+            st.stop()
+        fit_scores = dict(matches)
+        results = db.get_candidates_by_ids([candidate_id for candidate_id, _ in matches])
+        if not results:
+            st.info("No indexed resumes yet. Run `python rag_engine.py index-resumes` to index existing candidates.")
+        for rank, row in enumerate(results, start=1):
+            st.caption(f"Fit for {fit_role}: {fit_scores[row['id']]:.2f}")
+            render_candidate(rank, row)
+        st.stop()
+
+    sort_by = st.selectbox("Sort by", list(SORT_OPTIONS.keys()), format_func=SORT_OPTIONS.get)
+    if st.session_state.get("sort_by") != sort_by:
+        # page_cursors[i] is the keyset cursor that starts page i
+        st.session_state.sort_by = sort_by
+        st.session_state.page_cursors = [None]
+        st.session_state.page_index = 0
     
-    for index, row in df.iterrows():
-        with st.expander(f"#{index+1} | {row['full_name']} | Score: {row['match_score']:.2f}"):
-            c1, c2 = st.columns(2)
-            with c1:
-                st.write(f"**Email:** {row['email']}")
-                st.write(f"**Phone:** {row['phone']}")
-                st.write(f"**Experience:** {row['years_experience']}")
-                st.write(f"**Tech Stack:** {row['tech_stack']}")
-                st.write(f"**Sentiment:** {row['sentiment_analysis']}")
-            with c2:
-                st.write("**Resume Summary:**")
-                st.caption(row.get('resume_text', '')[:500] + "...")
-            
-            st.divider()
-            st.write("**Interview Transcript:**")
-            transcript = row.get('interview_transcript')
-            if transcript:
-                try:
-                    transcript_json = json.loads(transcript)
-                    for msg in transcript_json:
-                        role_icon = "🤖" if msg['role'] == "assistant" else "👤"
-                        st.write(f"{role_icon} **{msg['role'].title()}:** {msg['content']}")
-                except:
-                    st.write("No transcript available or invalid format.")
-            else:
-                st.write("No interview conducted.")
+    page_index = st.session_state.page_index
+    rows, next_cursor = db.list_candidates(sort_by, PAGE_SIZE, st.session_state.page_cursors[page_index])
+    
+    for offset, row in enumerate(rows):
+        render_candidate(page_index * PAGE_SIZE + offset + 1, row)
+    
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("Previous", disabled=page_index == 0):
+            st.session_state.page_index -= 1
+            st.rerun()
+    with page_col:
+        st.caption(f"Page {page_index + 1}")
+    with next_col:
+        if st.button("Next", disabled=next_cursor is None):
+            if len(st.session_state.page_cursors) == page_index + 1:
+                st.session_state.page_cursors.append(next_cursor)
+            st.session_state.page_index += 1
+            st.rerun()
 
     if st.button("Refresh Data"):
         st.rerun()
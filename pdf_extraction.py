@@ -0,0 +1,161 @@
+import concurrent.futures
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from typing import List, Tuple
+
+# Extraction budget
+PDF_MAX_BYTES = 10 * 1024 * 1024
+PDF_MAX_PAGES = 30
+PDF_TIMEOUT_SECONDS = 20
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def read_file_bytes(file) -> bytes:
+    """Reads a path, raw bytes or a file-like object (e.g. a Streamlit UploadedFile) into bytes."""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    position = file.tell()
+    data = file.read()
+    file.seek(position)
+    return data
+
+def file_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> List[str]:
+    """Worker: extracts the text of pages [start, stop). A broken page yields an empty string."""
+    import pypdf
+
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    texts = []
+    for index in range(start, stop):
+        try:
+            texts.append(reader.pages[index].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+def count_pages(data: bytes) -> int:
+    import pypdf
+
+    return len(pypdf.PdfReader(io.BytesIO(data)).pages)
+
+def extract_pdf_text(data: bytes, max_pages: int = PDF_MAX_PAGES) -> str:
+    """Extracts text sequentially in the current process (for callers that are already parallel)."""
+    return "".join(_extract_page_range(data, 0, min(count_pages(data), max_pages)))
+
+class ExtractionPool:
+    """
+    A pool of spawned worker processes that can give up on stuck tasks without disturbing other callers.
+    ProcessPoolExecutor can't stop a running task, and killing one worker breaks every future on the
+    pool, so abandon() retires the whole pool instead: it takes no new work, and its processes are
+    terminated once everything else submitted to it has finished (or been abandoned too).
+    """
+    def __init__(self, workers: int = PDF_WORKERS):
+        # Spawned, not forked: forking copies the server's threads (and any locks they hold) into the workers
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.retired = False
+        self._killed = False
+        self._in_flight = set()
+        self._abandoned = set()
+        self._lock = threading.Lock()
+
+    @property
+    def usable(self) -> bool:
+        # A worker that crashed (e.g. on a PDF that segfaults the parser) leaves the executor broken
+        return not self.retired and not getattr(self.executor, "_broken", False)
+
+    def submit(self, fn, *args) -> concurrent.futures.Future:
+        with self._lock:
+            if self._killed:
+                raise RuntimeError("Extraction pool was shut down")
+            future = self.executor.submit(fn, *args)
+            self._in_flight.add(future)
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future):
+        with self._lock:
+            self._in_flight.discard(future)
+            self._abandoned.discard(future)
+        self._kill_if_idle()
+
+    def abandon(self, futures):
+        """Gives up on futures that overran their deadline and retires the pool."""
+        stuck = [future for future in futures if not future.cancel()]  # queued tasks are simply cancelled
+        with self._lock:
+            self.retired = True
+            self._abandoned.update(future for future in stuck if not future.done())
+        self._kill_if_idle()
+
+    def _kill_if_idle(self):
+        with self._lock:
+            if not self.retired or self._killed or not self._in_flight <= self._abandoned:
+                return
+            self._killed = True
+        # Not from the executor's own callback thread: shutdown() would wait on it
+        threading.Thread(target=self._kill, daemon=True, name="pdf-pool-reaper").start()
+
+    def _kill(self):
+        for process in list((getattr(self.executor, "_processes", None) or {}).values()):
+            process.terminate()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def _get_pool() -> ExtractionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or not _pool.usable:
+            _pool = ExtractionPool()
+        return _pool
+
+def extract_pdf_text_parallel(data: bytes, max_pages: int = PDF_MAX_PAGES, timeout: float = PDF_TIMEOUT_SECONDS) -> Tuple[str, bool]:
+    """
+    Extracts text page by page across a process pool, keeping at most `max_pages` pages.
+    Returns (text, complete); `complete` is False if the timeout expired or a worker failed, so
+    some pages are missing. Everything that parses the PDF, page counting included, runs in the
+    workers under the one deadline; a document that hangs the parser costs `timeout` at most.
+    """
+    deadline = time.monotonic() + timeout
+    pool = _get_pool()
+    count_future = pool.submit(count_pages, data)
+    done, _ = concurrent.futures.wait([count_future], timeout=timeout)
+    if not done:
+        print(f"PDF extraction exceeded {timeout}s while counting pages")
+        pool.abandon([count_future])
+        return "", False
+    page_count = min(count_future.result(), max_pages)  # an unreadable PDF raises here
+    if page_count == 0:
+        return "", True
+
+    # Contiguous page ranges, one per worker, so each worker parses the document only once
+    n_ranges = min(PDF_WORKERS, page_count)
+    bounds = [round(i * page_count / n_ranges) for i in range(n_ranges + 1)]
+    pool = _get_pool()
+    futures = [pool.submit(_extract_page_range, data, bounds[i], bounds[i + 1]) for i in range(n_ranges)]
+
+    done, not_done = concurrent.futures.wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    if not_done:
+        print(f"PDF extraction exceeded {timeout}s; returning partial text")
+        pool.abandon(not_done)
+
+    parts = []
+    for i, future in enumerate(futures):
+        if future in done and future.exception() is None:
+            parts.extend(future.result())
+        else:
+            parts.extend([""] * (bounds[i + 1] - bounds[i]))
+    complete = not not_done and all(future.exception() is None for future in done)
+    return "".join(parts), complete
@@ -1,64 +1,276 @@
 import os
-import pypdf
-from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
-from langchain_core.documents import Document
+import hashlib
+import numpy as np
 import shutil
+from typing import List, Tuple
+from cache import DiskCache
+import metrics
+import pdf_extraction
+from embedding_store import EmbeddingStore, store_path_for
+from lazy import LazyProxy
 
 # Constants
 PERSIST_DIRECTORY = "./chroma_db"
 EMBEDDING_MODEL_NAME = "nomic-embed-text"
+RESUME_COLLECTION_NAME = "resumes"
+RESUME_INDEX_BATCH_SIZE = 256
+EMBEDDING_CACHE_MAX_ENTRIES = 20000
+PDF_TEXT_CACHE_MAX_ENTRIES = 2000
+RESUME_CHUNK_CHARS = 1500
+CHUNK_TOP_K = 3
+SECTION_HEADINGS = {
+    "summary", "profile", "objective", "experience", "work experience", "professional experience",
+    "employment history", "education", "skills", "technical skills", "projects", "certifications",
+    "publications", "achievements", "awards", "languages", "interests",
+}
+
+class CachedEmbeddings:
+    """
+    Wraps an embeddings client with a persistent cache keyed by (model name, normalized-text hash).
+    Exposes the same embed_query / embed_documents interface, so it can be handed to Chroma as well.
+    """
+    def __init__(self, embeddings, model_name: str, cache: DiskCache = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or DiskCache("embeddings", max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+
+    def _key(self, text: str) -> str:
+        # Whitespace differences (e.g. from PDF extraction) shouldn't produce a new embedding
+        normalized = " ".join(text.split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds several texts, sending only the cache misses to the model in a single batch."""
+        keys = [self._key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            with metrics.timer("ollama.embed"):
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_entries = {
+                key: np.asarray(vector, dtype=np.float32).tobytes()
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            self.cache.set_many(new_entries)
+            cached.update(new_entries)
+
+        return [np.frombuffer(cached[key], dtype=np.float32).tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        cached = self.cache.get(key)
+        if cached is None:
+            with metrics.timer("ollama.embed"):
+                vector = self.embeddings.embed_query(text)
+            cached = np.asarray(vector, dtype=np.float32).tobytes()
+            self.cache.set(key, cached)
+        return np.frombuffer(cached, dtype=np.float32).tolist()
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+def _is_section_heading(line: str) -> bool:
+    line = line.strip().rstrip(":")
+    if not line or len(line) > 40:
+        return False
+    return line.lower() in SECTION_HEADINGS or (line.isupper() and len(line.split()) <= 4)
+
+def split_resume(text: str, max_chars: int = RESUME_CHUNK_CHARS) -> List[str]:
+    """
+    Splits resume text into chunks that follow its sections (Experience, Skills, ...).
+    Sections longer than `max_chars` are further split on line boundaries.
+    """
+    sections = [[]]
+    for line in text.splitlines():
+        if _is_section_heading(line) and sections[-1]:
+            sections.append([])
+        if line.strip():
+            sections[-1].append(line.strip())
+
+    chunks = []
+    for section in sections:
+        current = ""
+        for line in section:
+            # Hard-wrap single lines that are longer than a whole chunk
+            while len(line) > max_chars:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:max_chars])
+                line = line[max_chars:]
+            if current and len(current) + len(line) + 1 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+    return chunks
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row so that dot products are cosine similarities."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
 
 class RAGEngine:
     def __init__(self):
-        self.embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL_NAME)
+        # langchain/chromadb are slow to import, so they are only loaded once an engine is built
+        from langchain_ollama import OllamaEmbeddings
+        import database as db
+        from llm_client import LLM_KEEP_ALIVE
+
+        self.embeddings = CachedEmbeddings(
+            OllamaEmbeddings(model=EMBEDDING_MODEL_NAME, keep_alive=LLM_KEEP_ALIVE), EMBEDDING_MODEL_NAME
+        )
         self.vector_store = None
+        self.resume_store = None
+        self.jd_roles = []
+        self.jd_versions = {}
+        self.jd_matrix = None
+        self.jd_revision = None
+        self._stored_jd_hashes = {}  # role -> content hash of the JD document known to be stored
+        self.pdf_text_cache = DiskCache("pdf_text", max_entries=PDF_TEXT_CACHE_MAX_ENTRIES)
+        # Every indexed resume's embedding, memory-mapped, for scoring all candidates against all roles at once
+        self.candidate_embeddings = EmbeddingStore(store_path_for(db.DB_FILE))
         self._initialize_vector_store()
+        try:
+            self._build_jd_matrix()
+        except Exception as e:
+            # Ollama may not be up yet; the matrix is built on first use instead
+            print(f"Error embedding job descriptions: {e}")
 
     def _initialize_vector_store(self):
         """Initializes the ChromaDB vector store."""
+        from langchain_chroma import Chroma
+
         # Check if vector store exists, if not create it
         self.vector_store = Chroma(
             persist_directory=PERSIST_DIRECTORY,
             embedding_function=self.embeddings
         )
+        # Candidate resumes live in their own collection, searched by cosine similarity
+        self.resume_store = Chroma(
+            collection_name=RESUME_COLLECTION_NAME,
+            persist_directory=PERSIST_DIRECTORY,
+            embedding_function=self.embeddings,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
 
+    def _build_jd_matrix(self):
+        """
+        Embeds the current version of every job description in the registry into a row-normalized
+        float32 matrix. Unchanged JDs come from the embedding cache, so an edit re-embeds only that JD.
+        """
+        import database as db
+
+        db.init_db()
+        revision = db.get_registry_revision()
+        rows = db.get_current_job_descriptions()
+        vectors = np.asarray(self.embeddings.embed_documents([row["content"] for row in rows]), dtype=np.float32)
+        self.jd_matrix = _normalize_rows(vectors)
+        self.jd_roles = [row["role"] for row in rows]
+        self.jd_versions = {row["role"]: row["version"] for row in rows}
+        self.jd_revision = revision
+
+    def _get_jd_matrix(self) -> np.ndarray:
+        import database as db
+
+        # A cheap MAX(id) lookup notices JD edits made by other sessions or processes
+        if self.jd_matrix is None or db.get_registry_revision() != self.jd_revision:
+            self._build_jd_matrix()
+        return self.jd_matrix
+
+    @metrics.timed("rag.parse_pdf")
     def parse_pdf(self, file) -> str:
-        """Extracts text from a PDF file object."""
+        """
+        Extracts text from a PDF file object (or path/bytes).
+        Pages are extracted in parallel within the budget set in pdf_extraction
+        (max bytes, max pages, timeout), and the result is cached by file hash.
+        """
         try:
-            pdf_reader = pypdf.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ""
+            data = pdf_extraction.read_file_bytes(file)
+            if len(data) > pdf_extraction.PDF_MAX_BYTES:
+                print(f"Error parsing PDF: file exceeds {pdf_extraction.PDF_MAX_BYTES} bytes")
+                return ""
+
+            cache_key = f"{pdf_extraction.file_sha256(data)}:{pdf_extraction.PDF_MAX_PAGES}"
+            text = self.pdf_text_cache.get(cache_key)
+            if text is not None:
+                return text
+
+            with metrics.timer("pdf.extract"):
+                text, complete = pdf_extraction.extract_pdf_text_parallel(data)
+            # Partial results from a timed-out extraction are not cached
+            if complete:
+                self.pdf_text_cache.set(cache_key, text)
             return text
         except Exception as e:
             print(f"Error parsing PDF: {e}")
             return ""
 
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+    @metrics.timed("rag.add_jd_to_store")
     def add_jd_to_store(self, jd_text: str, jd_id: str = "current_jd"):
-        """Adds or updates the Job Description in the vector store."""
-        # Clear existing JD with the same ID to ensure we only compare against the current one
-        # Note: Chroma doesn't have a direct 'delete by metadata' easily exposed in all versions, 
-        # but we can just add it and retrieval will find it. 
-        # For a cleaner approach in this simple app, we might want to reset the DB or just use a specific collection.
-        # For now, we'll just add it.
-        
-        # A better approach for this specific "Gatekeeper" flow might be to not even persist the JD 
-        # if we only compare 1:1 at runtime, but using a vector store allows for future scalability 
-        # (e.g. matching against multiple open positions).
-        
-        doc = Document(page_content=jd_text, metadata={"type": "jd", "id": jd_id})
-        self.vector_store.add_documents([doc])
-        # self.vector_store.persist() # Chroma 0.4+ persists automatically
+        """
+        Upserts the Job Description as one document per `jd_id` (the role), so an edited JD
+        replaces its previous version. Re-adding unchanged text (e.g. on every Streamlit rerun)
+        is a no-op: the stored document's content hash is compared first.
+        """
+        content_hash = self._content_hash(jd_text)
+        if self._stored_jd_hashes.get(jd_id) == content_hash:
+            return
+
+        doc_id = f"jd-{jd_id}"
+        existing = self.vector_store.get(ids=[doc_id], include=["metadatas"])
+        if not existing["ids"] or existing["metadatas"][0].get("content_hash") != content_hash:
+            from langchain_core.documents import Document
+
+            doc = Document(page_content=jd_text, metadata={"type": "jd", "id": jd_id, "content_hash": content_hash})
+            # langchain-chroma upserts when explicit IDs are given
+            self.vector_store.add_documents([doc], ids=[doc_id])
+        self._stored_jd_hashes[jd_id] = content_hash
+
+    def compact_vector_store(self) -> int:
+        """
+        Leaves one JD document per role, holding the registry's current version, and removes
+        the duplicates and superseded versions left by older versions of add_jd_to_store.
+        Returns the number of documents removed.
+        """
+        import database as db
+
+        db.init_db()
+        current = db.get_job_descriptions()
+        stored = self.vector_store.get(where={"type": "jd"}, include=[])
+        keep = {f"jd-{role}" for role in current}
+        stale_ids = [doc_id for doc_id in stored["ids"] if doc_id not in keep]
+        if stale_ids:
+            self.vector_store.delete(ids=stale_ids)
+        self._stored_jd_hashes.clear()
+        for role, content in current.items():
+            self.add_jd_to_store(content, jd_id=role)
+        return len(stale_ids)
 
-    def calculate_match_score(self, resume_text: str, jd_text: str) -> float:
+    @metrics.timed("rag.calculate_match_score")
+    def calculate_match_score(self, resume_text: str, jd_text: str, chunked: bool = False) -> float:
         """
         Calculates a semantic similarity score between the resume and the JD.
         Returns a float between 0 and 1.
+        With `chunked=True` the resume is scored section by section (see score_resume_chunks).
         """
         if not resume_text or not jd_text:
             return 0.0
 
+        if chunked:
+            return self.score_resume_chunks(resume_text, jd_text)["score"]
+
         # We can use the vector store to do a similarity search, 
         # OR since we have the text right here, we can just compute cosine similarity directly 
         # using the embeddings. This is often faster and more direct for 1:1 comparison.
@@ -67,8 +279,6 @@ class RAGEngine:
         jd_embedding = self.embeddings.embed_query(jd_text)
         
         # Compute Cosine Similarity manually or use a utility
-        import numpy as np
-        
         def cosine_similarity(a, b):
             return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
             
@@ -77,9 +287,196 @@ class RAGEngine:
         # Normalize/Clip if necessary (usually -1 to 1, but for text it's mostly 0 to 1)
         return max(0.0, min(1.0, float(score)))
 
+    @metrics.timed("rag.score_resume_chunks")
+    def score_resume_chunks(self, resume_text: str, jd_text: str, top_k: int = CHUNK_TOP_K, aggregate: str = "mean") -> dict:
+        """
+        Scores a resume chunk by chunk, so long resumes aren't truncated by the embedding model.
+        All chunks (and the JD) are embedded in one batched call; the score is the max or mean
+        of the top-k chunk-to-JD similarities.
+        Returns {"score": float, "chunks": [(chunk_text, similarity), ...]} with the top-k chunks.
+        """
+        if aggregate not in ("mean", "max"):
+            raise ValueError(f"Unknown aggregate: {aggregate}")
+
+        chunks = split_resume(resume_text)
+        if not chunks or not jd_text:
+            return {"score": 0.0, "chunks": []}
+
+        vectors = _normalize_rows(np.asarray(self.embeddings.embed_documents(chunks + [jd_text]), dtype=np.float32))
+        similarities = vectors[:-1] @ vectors[-1]
+
+        top = np.argsort(-similarities)[:top_k]
+        top_similarities = similarities[top]
+        score = top_similarities.max() if aggregate == "max" else top_similarities.mean()
+
+        return {
+            "score": max(0.0, min(1.0, float(score))),
+            "chunks": [(chunks[i], float(similarities[i])) for i in top],
+        }
+
+    @metrics.timed("rag.rank_roles")
+    def rank_roles(self, resume_text: str, top_k: int = None) -> List[Tuple[str, float]]:
+        """
+        Scores a resume against every role in the JD registry with a single matrix-vector product.
+        Returns (role, score) pairs sorted from best to worst fit.
+        """
+        if not resume_text:
+            return []
+
+        jd_matrix = self._get_jd_matrix()
+        resume_vector = _normalize_rows(np.asarray(self.embeddings.embed_query(resume_text), dtype=np.float32))
+        scores = np.clip(jd_matrix @ resume_vector, 0.0, 1.0)
+
+        order = np.argsort(-scores)[:top_k]
+        return [(self.jd_roles[i], float(scores[i])) for i in order]
+
+    @metrics.timed("rag.score_against_roles")
+    def score_against_roles(self, resume_texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Scores many resumes against every role at once: one batched embed_documents call
+        and one matrix product. Returns (roles, scores) where scores[i, j] is resume i vs role j.
+        """
+        jd_matrix = self._get_jd_matrix()
+        if not resume_texts:
+            return list(self.jd_roles), np.zeros((0, len(self.jd_roles)), dtype=np.float32)
+        resume_matrix = _normalize_rows(np.asarray(self.embeddings.embed_documents(resume_texts), dtype=np.float32))
+        return list(self.jd_roles), np.clip(resume_matrix @ jd_matrix.T, 0.0, 1.0)
+
+    @metrics.timed("rag.index_resumes")
+    def index_resumes(self, records: List[Tuple[int, str, str, float]]):
+        """
+        Upserts (candidate_id, resume_text, role, match_score) records into the resume collection
+        and appends their embeddings to the candidate embedding store.
+        Embeddings come from the embedding cache, so resumes already scored during screening
+        are not embedded again.
+        """
+        records = [record for record in records if record[1]]
+        for start in range(0, len(records), RESUME_INDEX_BATCH_SIZE):
+            batch = records[start:start + RESUME_INDEX_BATCH_SIZE]
+            metadatas = []
+            for candidate_id, _, role, match_score in batch:
+                metadata = {"candidate_id": candidate_id, "role": role or ""}
+                if match_score is not None:
+                    metadata["match_score"] = float(match_score)
+                metadatas.append(metadata)
+            texts = [record[1] for record in batch]
+            vectors = self.embeddings.embed_documents(texts)
+            # Upserting with the embeddings in hand avoids a second embed_documents round trip
+            self.resume_store._collection.upsert(
+                ids=[f"candidate-{record[0]}" for record in batch],
+                embeddings=vectors,
+                documents=texts,
+                metadatas=metadatas,
+            )
+            self.candidate_embeddings.add([record[0] for record in batch], vectors)
+
+    def update_resume_scores(self, scores: List[Tuple[int, float]]):
+        """Updates the match_score metadata of already-indexed resumes (e.g. after rescoring); unknown IDs are skipped."""
+        if scores:
+            self.resume_store._collection.update(
+                ids=[f"candidate-{candidate_id}" for candidate_id, _ in scores],
+                metadatas=[{"match_score": float(score)} for _, score in scores],
+            )
+
+    def index_resume(self, candidate_id: int, resume_text: str, role: str, match_score: float = None):
+        """Stores one candidate's resume embedding in the resume collection."""
+        self.index_resumes([(candidate_id, resume_text, role, match_score)])
+
+    @metrics.timed("rag.score_matrix")
+    def score_matrix(self) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """
+        Scores every stored candidate against every role in one vectorized pass.
+        Returns (candidate_ids, roles, scores) where scores[i, j] is candidate i vs role j.
+        """
+        jd_matrix = self._get_jd_matrix()
+        candidate_ids, scores = self.candidate_embeddings.score(jd_matrix)
+        return candidate_ids, list(self.jd_roles), np.clip(scores, 0.0, 1.0)
+
+    @metrics.timed("rag.rank_candidates_for_role")
+    def rank_candidates_for_role(self, role: str, k: int = 20) -> List[Tuple[int, float]]:
+        """The k stored candidates whose resumes best match a role's JD, as (candidate_id, score), best first."""
+        jd_matrix = self._get_jd_matrix()
+        query = jd_matrix[self.jd_roles.index(role)]
+        return [(candidate_id, min(max(score, 0.0), 1.0)) for candidate_id, score in self.candidate_embeddings.top_k(query, k)]
+
+    @metrics.timed("rag.score_candidates")
+    def score_candidates(self, candidate_ids: List[int], resume_texts: List[str], jd_text: str) -> np.ndarray:
+        """
+        Match scores for stored candidates against a JD, as calculate_match_score would compute them.
+        Resume embeddings come from the candidate embedding store where present, otherwise from the
+        embedding cache (or the model, in one batch); empty resumes score 0.
+        """
+        jd_vector = _normalize_rows(np.asarray(self.embeddings.embed_query(jd_text), dtype=np.float32))
+        found_ids, found_vectors = self.candidate_embeddings.get(candidate_ids)
+        vectors = dict(zip(found_ids, found_vectors))
+
+        missing = [(candidate_id, text) for candidate_id, text in zip(candidate_ids, resume_texts)
+                   if candidate_id not in vectors and text]
+        if missing:
+            embedded = self.embeddings.embed_documents([text for _, text in missing])
+            vectors.update(zip([candidate_id for candidate_id, _ in missing], np.asarray(embedded, dtype=np.float32)))
+
+        scores = np.zeros(len(candidate_ids), dtype=np.float32)
+        rows = [i for i, (candidate_id, text) in enumerate(zip(candidate_ids, resume_texts)) if text and candidate_id in vectors]
+        if rows:
+            matrix = _normalize_rows(np.stack([vectors[candidate_ids[i]] for i in rows]))
+            scores[rows] = np.clip(matrix @ jd_vector, 0.0, 1.0)
+        return scores
+
+    @metrics.timed("rag.search_resumes")
+    def search_resumes(self, query: str, k: int = 10, role: str = None, min_match_score: float = None) -> List[Tuple[int, float]]:
+        """
+        Approximate nearest-neighbour search over stored resumes, optionally filtered by
+        role and minimum match score. Returns (candidate_id, similarity) pairs, best first.
+        """
+        filters = []
+        if role:
+            filters.append({"role": role})
+        if min_match_score is not None:
+            filters.append({"match_score": {"$gte": min_match_score}})
+        where = None
+        if len(filters) == 1:
+            where = filters[0]
+        elif filters:
+            where = {"$and": filters}
+
+        results = self.resume_store.similarity_search_with_score(query, k=k, filter=where)
+        # Cosine distance -> similarity
+        return [(doc.metadata["candidate_id"], 1.0 - distance) for doc, distance in results]
+
+    @metrics.timed("rag.query_vector_store")
     def query_vector_store(self, query: str, k: int = 3):
         """Queries the vector store for relevant context (e.g. from the JD)."""
         return self.vector_store.similarity_search(query, k=k)
 
-# Singleton instance for easy import
-rag_engine = RAGEngine()
+# Singleton instance for easy import; built on first use
+rag_engine = LazyProxy(RAGEngine)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RAG engine maintenance commands.")
+    parser.add_argument("command", choices=["compact", "index-resumes"],
+                        help="compact: remove duplicate and superseded JD documents from the Chroma store and superseded rows "
+                             "from the candidate embedding store; "
+                             "index-resumes: add every stored candidate to the resume collection and embedding store")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        removed = rag_engine.compact_vector_store()
+        print(f"Removed {removed} duplicate or superseded JD document(s) from {PERSIST_DIRECTORY}")
+        dropped = rag_engine.candidate_embeddings.compact()
+        print(f"Removed {dropped} superseded embedding(s) from {rag_engine.candidate_embeddings.path}")
+    elif args.command == "index-resumes":
+        import database as db
+
+        db.init_db()
+        records = [
+            (row["id"], row["resume_text"], row["desired_positions"], row["match_score"])
+            for row in db.view_all_candidates() if not row["in_progress"]
+        ]
+        rag_engine.index_resumes(records)
+        # Re-indexing appends a new row per candidate; drop the ones it superseded
+        rag_engine.candidate_embeddings.compact()
+        print(f"Indexed {len(records)} candidate resume(s) into the '{RESUME_COLLECTION_NAME}' collection "
+              f"and {rag_engine.candidate_embeddings.path}")
@@ -0,0 +1,113 @@
+"""
+Background rescoring after a job description edit.
+
+database.save_job_description queues a rescore job whenever a role's JD changes. A job
+rescores only the candidates who applied to that role against the new version, in batches,
+using their stored resume embeddings, and records its progress so the dashboard can show it.
+Each batch is committed together with the role's aggregates; a newer edit supersedes the job.
+
+Every drain first queues jobs for roles that still have candidates scored against an older
+version (see database.enqueue_stale_rescores), so nothing is missed across restarts or when
+a candidate screened before an edit is saved after its rescore ran.
+
+In the app, start_background_rescorer() starts a daemon thread (once per process) that drains
+the queue at startup and then every RESCORE_POLL_INTERVAL seconds, or at once when woken
+after a JD edit. The queue can also be drained from the command line (e.g. after editing
+JDs while the app is down).
+
+Usage:
+    python rescoring.py
+"""
+import threading
+import time
+
+import database as db
+from rag_engine import rag_engine
+
+RESCORE_BATCH_SIZE = 256
+RESCORE_POLL_INTERVAL = 60  # seconds between background drains when nothing wakes the thread
+
+_thread = None
+_wakeup = threading.Event()
+_lock = threading.Lock()
+
+def run_job(job: dict, report=None) -> bool:
+    """Rescores one claimed job. Returns False if it was superseded before finishing."""
+    jd = db.get_current_job_description(job["role"])
+    if jd is None or jd["version"] != job["jd_version"]:
+        return False
+    processed = 0
+    while True:
+        batch = db.get_candidates_to_rescore(job["role"], job["jd_version"], RESCORE_BATCH_SIZE)
+        if not batch:
+            return True
+        candidate_ids = [row["id"] for row in batch]
+        scores = rag_engine.score_candidates(candidate_ids, [row["resume_text"] for row in batch], jd["content"])
+        pairs = list(zip(candidate_ids, scores.tolist()))
+        if not db.save_rescored_batch(job["id"], job["role"], job["jd_version"], pairs):
+            return False
+        try:
+            rag_engine.update_resume_scores(pairs)
+        except Exception as e:
+            print(f"Error updating resume collection scores: {e}")
+        processed += len(batch)
+        if report:
+            report(job, processed)
+
+def drain(report=None) -> int:
+    """Queues jobs for stale roles, then runs queued rescore jobs until the queue is empty. Returns the number of jobs run."""
+    db.enqueue_stale_rescores()
+    jobs = 0
+    while True:
+        job = db.claim_rescore_job()
+        if job is None:
+            return jobs
+        try:
+            if run_job(job, report):
+                db.finish_rescore_job(job["id"])
+        except Exception as e:
+            print(f"Error rescoring {job['role']} (JD version {job['jd_version']}): {e}")
+            db.finish_rescore_job(job["id"], str(e))
+        jobs += 1
+
+def _background_loop():
+    db.init_db()
+    while True:
+        _wakeup.clear()  # a wake-up that arrives while draining triggers another drain straight away
+        try:
+            drain()
+        except Exception as e:
+            print(f"Error draining the rescore queue: {e}")
+        _wakeup.wait(RESCORE_POLL_INTERVAL)
+
+def start_background_rescorer(wake: bool = False):
+    """
+    Starts the rescorer thread (once per process); cheap enough to call on every page load.
+    Pass wake=True after queuing a job to drain now instead of at the next poll.
+    """
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_background_loop, daemon=True, name="jd-rescore")
+            _thread.start()
+            return
+    if wake:
+        _wakeup.set()
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    db.init_db()
+    started = time.perf_counter()
+
+    def report(job, processed):
+        print(f"{job['role']} v{job['jd_version']}: {processed}/{job['total']} candidates rescored")
+
+    jobs = drain(report)
+    print(f"Ran {jobs} rescore job(s) in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()